@@ -0,0 +1,86 @@
+import argparse
+import csv
+import json
+import sys
+
+import degrees
+
+
+def read_pairs(infile):
+    """
+    Returns a dictionary mapping each source person id to the target
+    person ids requested for it, as dictionary keys in first-seen
+    order so that repeated pairs are dropped in constant time.
+
+    Each line of infile is a `source,target` pair of person ids.
+    A `source,target` header line is skipped.
+    """
+    groups = {}
+    for row in csv.reader(infile):
+        if len(row) < 2 or row[:2] == ["source", "target"]:
+            continue
+        source, target = row[0].strip(), row[1].strip()
+        groups.setdefault(source, {})[target] = None
+    return groups
+
+
+def run_batch(groups, outfile):
+    """
+    Runs one search per source and writes one JSON line per
+    (source, target) pair as soon as its source group is done.
+    """
+    for source, targets in groups.items():
+        known = []
+        for target in targets:
+            for person_id in (source, target):
+                try:
+                    degrees.person_record(person_id)
+                except KeyError:
+                    write_result(outfile, source, target, error=f"unknown person id {person_id}")
+                    break
+            else:
+                known.append(target)
+
+        if not known:
+            continue
+        paths = degrees.shortest_paths_from(source, known)
+        for target in known:
+            write_result(outfile, source, target, path=paths[target])
+        outfile.flush()
+
+
+def write_result(outfile, source, target, path=None, error=None):
+    result = {"source": source, "target": target}
+    if error is not None:
+        result["error"] = error
+    else:
+        result["degrees"] = None if path is None else len(path)
+        result["path"] = path
+    outfile.write(json.dumps(result) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer a file of degrees queries, grouped by source."
+    )
+    parser.add_argument("pairs", help="CSV file of source,target person ids")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--output", help="write JSON lines here instead of stdout")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, snapshot=True)
+    print("Data loaded.", file=sys.stderr)
+
+    with open(args.pairs, encoding="utf-8", newline="") as f:
+        groups = read_pairs(f)
+
+    if args.output is None:
+        run_batch(groups, sys.stdout)
+    else:
+        with open(args.output, "w", encoding="utf-8") as outfile:
+            run_batch(groups, outfile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import random
+import time
+
+import degrees
+
+
+def misspell(name, rng):
+    """
+    Returns name with one random character dropped, swapped or replaced.
+    """
+    if len(name) < 3:
+        return name
+    i = rng.randrange(len(name) - 1)
+    kind = rng.randrange(3)
+    if kind == 0:
+        return name[:i] + name[i + 1:]
+    if kind == 1:
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    return name[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + name[i + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark autocomplete and fuzzy name lookup."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, snapshot=True)
+    start = time.perf_counter()
+    index = degrees.get_name_index()
+    print(f"Built index over {len(index.keys)} names in "
+          f"{time.perf_counter() - start:.3f}s")
+
+    rng = random.Random(args.seed)
+    names = rng.choices(index.keys, k=args.queries)
+
+    start = time.perf_counter()
+    for name in names:
+        index.complete(name[:rng.randint(1, len(name))], args.k)
+    elapsed = time.perf_counter() - start
+    print(f"complete: {elapsed / len(names) * 1000:.3f} ms/query")
+
+    found = 0
+    start = time.perf_counter()
+    for name in names:
+        matches = index.search(misspell(name, rng), args.k)
+        found += any(match == name for match, _ in matches)
+    elapsed = time.perf_counter() - start
+    print(f"search:   {elapsed / len(names) * 1000:.3f} ms/query, "
+          f"recall@{args.k} {found / len(names):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import cProfile
+import pstats
+import random
+import time
+from array import array
+
+import degrees
+from generate import movie_rows, person_rows, star_rows
+from graph import CompactGraph
+from ingest import peak_memory
+
+ENGINES = {
+    "bfs": False,
+    "bidirectional": True
+}
+
+
+def synthetic_graph(size, seed):
+    """
+    Returns a CompactGraph of size people and size // 3 movies,
+    drawn from the same distributions as generate.py.
+    """
+    movies = max(size // 3, 1)
+    graph = CompactGraph()
+    for row in person_rows(size, seed):
+        graph.add_person(*row)
+    for row in movie_rows(movies, seed):
+        graph.add_movie(*row)
+
+    edge_people = array("i")
+    edge_movies = array("i")
+    for person_id, movie_id in star_rows(size, movies, seed):
+        edge_people.append(graph.person_index[person_id])
+        edge_movies.append(graph.movie_index[movie_id])
+    graph.build(edge_people, edge_movies)
+    return graph
+
+
+def use_graph(graph):
+    """
+    Makes degrees search the given CompactGraph.
+    """
+    degrees.clear_data()
+    degrees.graph = graph
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run(label, pairs, engines, profiler=None):
+    """
+    Runs every pair with every engine and prints a summary line each.
+    """
+    for engine in engines:
+        latencies = []
+        expanded = []
+        if profiler is not None:
+            profiler.enable()
+        for source, target in pairs:
+            start = time.perf_counter()
+            _, stats = degrees.search(source, target, ENGINES[engine])
+            latencies.append(time.perf_counter() - start)
+            expanded.append(stats.nodes_expanded)
+        if profiler is not None:
+            profiler.disable()
+
+        print(f"{label:>16} {engine:>13}: "
+              f"p50 {percentile(latencies, 0.5) * 1000:9.3f} ms  "
+              f"p99 {percentile(latencies, 0.99) * 1000:9.3f} ms  "
+              f"expanded mean {sum(expanded) / len(expanded):10.1f}  "
+              f"peak RSS {(peak_memory() or 0) / 2 ** 20:8.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark degrees searches on seeded random pairs."
+    )
+    parser.add_argument("directories", nargs="*", default=["small"],
+                        help="dataset directories to load (default: small)")
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[],
+                        help="also run on in-memory synthetic graphs of these sizes")
+    parser.add_argument("--pairs", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engine", choices=list(ENGINES), action="append",
+                        help="engines to run (default: all)")
+    parser.add_argument("--store", choices=["compact", "dict"], default="compact",
+                        help="in-memory representation for dataset directories")
+    parser.add_argument("--profile", action="store_true",
+                        help="print the top cProfile entries of the searches")
+    args = parser.parse_args()
+    engines = args.engine or list(ENGINES)
+    profiler = cProfile.Profile() if args.profile else None
+
+    datasets = [(directory, None) for directory in args.directories]
+    datasets += [(f"synthetic-{size}", size) for size in args.synthetic]
+
+    for label, size in datasets:
+        start = time.perf_counter()
+        if size is None:
+            degrees.load_data(label, compact=args.store == "compact")
+        else:
+            use_graph(synthetic_graph(size, args.seed))
+        print(f"{label}: loaded in {time.perf_counter() - start:.3f}s")
+
+        rng = random.Random(args.seed)
+        ids = degrees.all_person_ids()
+        pairs = [(rng.choice(ids), rng.choice(ids)) for _ in range(args.pairs)]
+        run(label, pairs, engines, profiler)
+
+    if profiler is not None:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+
+
+if __name__ == "__main__":
+    main()
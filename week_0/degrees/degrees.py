@@ -1,9 +1,15 @@
-import csv
+import heapq
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import CompactGraph
+from ingest import LoadReport, print_progress, read_sources
+from landmarks import load_landmarks
+from nameindex import NameIndex
+from snapshot import load_snapshot, save_snapshot
+from util import Node, DequeQueueFrontier, PathCache, SearchStats
 
-# Maps names to a set of corresponding person_ids
+# Maps names to a set of corresponding person_ids; a read-only
+# NameTable when the data was loaded from a snapshot
 names = {}
 
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
@@ -12,44 +18,128 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# CompactGraph holding people and movies when loaded in compact mode
+graph = None
 
-def load_data(directory):
+# LRU cache of shortest paths, cleared whenever data is reloaded
+path_cache = PathCache()
+
+# NameIndex over `names`, built on first use after data is loaded
+name_index = None
+
+# LandmarkIndex that prunes searches, when loaded with landmarks
+landmark_index = None
+
+
+def load_data(directory, compact=False, snapshot=False, progress=None, max_memory=None,
+              landmarks=0):
     """
     Load data from CSV files into memory.
+
+    If `compact` is True, people and movies are stored in an
+    integer-indexed CompactGraph instead of the `people` and
+    `movies` dictionaries.
+
+    If `snapshot` is True, the CompactGraph is loaded from a binary
+    snapshot next to the CSV files, which is written after the first
+    parse and rebuilt whenever one of the CSV files changes.
+    Implies `compact`.
+
+    CSV files are streamed in chunks of tuples. `progress` and
+    `max_memory` are passed to the returned LoadReport, which counts
+    the rows that were read and rejected. If the load fails, for
+    example with MemoryError over `max_memory`, nothing is left loaded.
+
+    If `landmarks` is more than 0, a landmark index with that many
+    hubs is loaded from next to the CSV files, or built and saved
+    there, and used to prune every search. Implies `compact`.
+    """
+    global names, graph, landmark_index
+    clear_data()
+    report = LoadReport(progress, max_memory)
+    try:
+        if snapshot:
+            graph = load_snapshot(directory)
+        if graph is None and (snapshot or compact or landmarks):
+            graph = CompactGraph.from_csv(directory, report)
+            if snapshot:
+                try:
+                    save_snapshot(graph, directory)
+                except OSError:
+                    pass
+
+        if graph is not None:
+            if graph.names is not None:
+                names = graph.names
+            else:
+                for person_id, name in zip(graph.person_ids, graph.person_names):
+                    names.setdefault(name.lower(), set()).add(person_id)
+            if landmarks:
+                landmark_index = load_landmarks(directory, graph, landmarks)
+            return report
+
+        _load_sources(read_sources(directory, report), report)
+        return report
+    except BaseException:
+        # Never leave a partly loaded dataset behind, e.g. after
+        # the memory cap stops the load
+        clear_data()
+        raise
+
+
+def clear_data():
+    """
+    Empties every structure filled by load_data.
+    """
+    global names, graph, name_index, landmark_index
+    path_cache.clear()
+    name_index = None
+    landmark_index = None
+    names = {}
+    people.clear()
+    movies.clear()
+    graph = None
+
+
+def _load_sources(sources, report):
+    """
+    Fills `names`, `people` and `movies` from the row chunks of
+    each CSV file, as returned by read_sources.
     """
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
+    for chunk in sources["people.csv"]:
+        for person_id, name, birth in chunk:
+            people[person_id] = {
+                "name": name,
+                "birth": birth,
                 "movies": set()
             }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
+            if name.lower() not in names:
+                names[name.lower()] = {person_id}
             else:
-                names[row["name"].lower()].add(row["id"])
+                names[name.lower()].add(person_id)
+        report.record("people.csv", len(chunk))
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
+    for chunk in sources["movies.csv"]:
+        for movie_id, title, year in chunk:
+            movies[movie_id] = {
+                "title": title,
+                "year": year,
                 "stars": set()
             }
+        report.record("movies.csv", len(chunk))
 
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    # Load stars, rejecting rows that name unknown people or movies
+    for chunk in sources["stars.csv"]:
+        rejected = 0
+        for person_id, movie_id in chunk:
+            if person_id not in people or movie_id not in movies:
+                rejected += 1
+                continue
+            people[person_id]["movies"].add(movie_id)
+            movies[movie_id]["stars"].add(person_id)
+        report.record("stars.csv", len(chunk) - rejected, rejected)
 
 
 def main():
@@ -59,15 +149,21 @@ def main():
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    report = load_data(directory, snapshot=True, progress=print_progress)
+    if report.rows:
+        print(file=sys.stderr)
+    if report.total_rejected():
+        print(f"Rejected {report.total_rejected()} rows: {report.rejected}")
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
+    name = input("Name: ")
+    source = person_id_for_name(name)
     if source is None:
-        sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+        sys.exit(not_found_message(name))
+    name = input("Name: ")
+    target = person_id_for_name(name)
     if target is None:
-        sys.exit("Person not found.")
+        sys.exit(not_found_message(name))
 
     path = shortest_path(source, target)
 
@@ -78,27 +174,75 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_record(path[i][1])["name"]
+            person2 = person_record(path[i + 1][1])["name"]
+            movie = movie_record(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is True, the search grows frontiers from
+    both ends instead of from the source only.
+
     If no possible path, returns None.
     """
+    path, _ = search(source, target, bidirectional)
+    return path
 
-    if source == target:
-        return []
 
-    explored_nodes = set()
-    frontier  = QueueFrontier()
-    initial_node = Node(source, None, None)
-    frontier.add(initial_node)
+def search(source, target, bidirectional=False, hook=None):
+    """
+    Like `shortest_path`, but returns a (path, stats) tuple, where
+    stats is a SearchStats with the counters and phase timings of
+    the search.
+
+    If `hook` is given, it is called as hook(person_id, stats)
+    every time a person is expanded.
+
+    If a landmark index is loaded, its pruned bidirectional search
+    is used whatever `bidirectional` is.
+    """
+    stats = SearchStats(hook)
+    if landmark_index is not None:
+        path = landmark_index.search(source, target, stats)[0]
+    elif bidirectional:
+        path = bidirectional_search(source, target, stats)[0]
+    else:
+        path = breadth_first_search(source, target, stats)[0]
+    return path, stats
+
+
+def cached_shortest_path(source, target, bidirectional=False):
+    """
+    Like `shortest_path`, but answers repeated and reversed queries
+    from `path_cache`.
+    """
+    found, path = path_cache.get(source, target)
+    if not found:
+        path = shortest_path(source, target, bidirectional)
+        path_cache.put(source, target, path)
+    return path
+
+
+def breadth_first_search(source, target, stats=None):
+    """
+    One-sided breadth-first search from source to target.
+
+    Returns a (path, stats) tuple, where path is in the same format
+    as `shortest_path` and stats is the SearchStats that was filled in.
+    """
+    if stats is None:
+        stats = SearchStats()
+
+    if graph is not None:
+        return graph.breadth_first_search(source, target, stats)
+
+    if source == target:
+        return [], stats
 
     def path_to_node(target_node):
         path = []
@@ -111,23 +255,245 @@ def shortest_path(source, target):
             path.append((node.action, node.state))
         return path
 
-    while True:
-        try:
+    with stats.phase("setup"):
+        explored_nodes = set()
+        frontier  = DequeQueueFrontier()
+        initial_node = Node(source, None, None)
+        frontier.add(initial_node)
+
+    found = None
+    with stats.phase("search"):
+        while found is None and not frontier.empty():
             current_node = frontier.remove()
-            if current_node in explored_nodes:
+            if current_node.state in explored_nodes:
                 continue
-            explored_nodes.add(current_node)
+            explored_nodes.add(current_node.state)
+            stats.expand(current_node.state, len(frontier.states))
             action_set = set()
             for movie in people[current_node.state]['movies']:
                 action_set.add(movie)
             for movie_id in action_set:
-                for actor_id in movies[movie_id]['stars']:
+                stars = movies[movie_id]['stars']
+                stats.edges_scanned += len(stars)
+                for actor_id in stars:
+                    if actor_id in explored_nodes or frontier.contains_state(actor_id):
+                        continue
                     new_node = Node(actor_id, current_node, movie_id)
                     if actor_id == target:
-                        return path_to_node(new_node)
+                        found = new_node
+                        break
                     frontier.add(new_node)
-        except:
-            return None
+                if found is not None:
+                    break
+
+    if found is None:
+        return None, stats
+    with stats.phase("path"):
+        path = path_to_node(found)
+    return path, stats
+
+
+def bidirectional_search(source, target, stats=None):
+    """
+    Breadth-first search grown from both source and target,
+    always expanding whichever frontier is smaller.
+
+    Returns a (path, stats) tuple, where path is in the same format
+    as `shortest_path` and stats is the SearchStats that was filled in.
+    """
+    if stats is None:
+        stats = SearchStats()
+
+    if source == target:
+        return [], stats
+
+    # Each side maps person_id -> (movie_id, previous person_id)
+    with stats.phase("setup"):
+        forward = {source: (None, None)}
+        backward = {target: (None, None)}
+        forward_depth = {source: 0}
+        backward_depth = {target: 0}
+        forward_frontier = [source]
+        backward_frontier = [target]
+
+    best = None
+    with stats.phase("search"):
+        while best is None and forward_frontier and backward_frontier:
+
+            # Expand one whole layer of the smaller side
+            if len(forward_frontier) <= len(backward_frontier):
+                frontier, parents, depth = forward_frontier, forward, forward_depth
+                other, other_depth = backward, backward_depth
+            else:
+                frontier, parents, depth = backward_frontier, backward, backward_depth
+                other, other_depth = forward, forward_depth
+
+            next_frontier = []
+            waiting = len(forward_frontier) + len(backward_frontier)
+            for person_id in frontier:
+                waiting -= 1
+                stats.expand(person_id, waiting + len(next_frontier))
+                neighbors = neighbors_for_person(person_id)
+                stats.edges_scanned += len(neighbors)
+                for movie_id, neighbor_id in neighbors:
+                    if neighbor_id in parents:
+                        continue
+                    parents[neighbor_id] = (movie_id, person_id)
+                    depth[neighbor_id] = depth[person_id] + 1
+                    next_frontier.append(neighbor_id)
+                    if neighbor_id in other:
+                        length = depth[neighbor_id] + other_depth[neighbor_id]
+                        if best is None or length < best[0]:
+                            best = (length, neighbor_id)
+
+            # Any meeting found in this layer is as short as it can get
+            if frontier is forward_frontier:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+
+    if best is None:
+        return None, stats
+    with stats.phase("path"):
+        path = _join_paths(forward, backward, best[1])
+    return path, stats
+
+
+def shortest_paths_from(source, targets):
+    """
+    Returns a dictionary mapping each of targets to the shortest list
+    of (movie_id, person_id) pairs that connect source to it, or to
+    None if it is not connected.
+
+    A single breadth-first search from source is run, recording
+    parent pointers until every target has been reached.
+    """
+    if graph is not None:
+        paths, _ = graph.shortest_paths_from(source, targets)
+        return paths
+
+    parents = {source: (None, None)}
+    remaining = set(targets) - {source}
+    frontier = [source]
+
+    while frontier and remaining:
+        next_frontier = []
+        for person_id in frontier:
+            for movie_id, neighbor_id in neighbors_for_person(person_id):
+                if neighbor_id in parents:
+                    continue
+                parents[neighbor_id] = (movie_id, person_id)
+                next_frontier.append(neighbor_id)
+                remaining.discard(neighbor_id)
+            if not remaining:
+                break
+        frontier = next_frontier
+
+    paths = {}
+    for target in targets:
+        if target not in parents:
+            paths[target] = None
+            continue
+        path = []
+        person_id = target
+        while parents[person_id][1] is not None:
+            movie_id, previous_id = parents[person_id]
+            path.append((movie_id, person_id))
+            person_id = previous_id
+        path.reverse()
+        paths[target] = path
+    return paths
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, one at a time.
+
+    The BFS layers from source are built once, keeping for each
+    person every (movie_id, person_id) edge that reaches them from
+    the previous layer. Paths are then enumerated lazily from that
+    layer DAG. Yields nothing if the two are not connected.
+    """
+    if source == target:
+        yield []
+        return
+
+    # Maps person_id -> list of (movie_id, person_id) one layer closer
+    predecessors = {source: []}
+    frontier = [source]
+    while frontier and target not in predecessors:
+        layer = {}
+        for person_id in frontier:
+            for movie_id, neighbor_id in neighbors_for_person(person_id):
+                if neighbor_id in predecessors:
+                    continue
+                layer.setdefault(neighbor_id, []).append((movie_id, person_id))
+        predecessors.update(layer)
+        frontier = list(layer)
+
+    if target not in predecessors:
+        return
+
+    # Depth-first walk back from target; each stack entry is the
+    # path so far (target end first) and the edges left to try
+    stack = [([], target, iter(predecessors[target]))]
+    while stack:
+        path, person_id, edges = stack[-1]
+        edge = next(edges, None)
+        if edge is None:
+            stack.pop()
+            continue
+        movie_id, previous_id = edge
+        extended = path + [(movie_id, person_id)]
+        if previous_id == source:
+            yield extended[::-1]
+        else:
+            stack.append((extended, previous_id, iter(predecessors[previous_id])))
+
+
+def best_shortest_paths(source, target, k, score=None):
+    """
+    Returns up to k shortest paths from source to target with the
+    highest score(path), best first.
+
+    Paths are drawn from `all_shortest_paths`, so only k of them are
+    kept in memory at once. By default paths are ranked by the year
+    of the most recent movie on them.
+    """
+    if score is None:
+        score = most_recent_year
+    return heapq.nlargest(k, all_shortest_paths(source, target), key=score)
+
+
+def most_recent_year(path):
+    """
+    Returns the year of the most recent movie on path, or 0 if none
+    of its movies has a known year.
+    """
+    years = [movie_record(movie_id)["year"] for movie_id, _ in path]
+    return max((int(year) for year in years if year.isdigit()), default=0)
+
+
+def _join_paths(forward, backward, meeting_id):
+    """
+    Builds the source-to-target path through meeting_id from the
+    parent maps of a bidirectional search.
+    """
+    path = []
+    person_id = meeting_id
+    while forward[person_id][1] is not None:
+        movie_id, previous_id = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = previous_id
+    path.reverse()
+
+    person_id = meeting_id
+    while backward[person_id][1] is not None:
+        movie_id, next_id = backward[person_id]
+        path.append((movie_id, next_id))
+        person_id = next_id
+    return path
 
 
 def person_id_for_name(name):
@@ -141,7 +507,7 @@ def person_id_for_name(name):
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = person_record(person_id)
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -156,11 +522,45 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def get_name_index():
+    """
+    Returns the NameIndex over `names`, building it if needed.
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex(names)
+    return name_index
+
+
+def suggest_names(name, k=5):
+    """
+    Returns up to k known names that are closest to name,
+    best first.
+    """
+    return [match for match, _ in get_name_index().search(name, k)]
+
+
+def not_found_message(name):
+    """
+    Returns the message for a name with no exact match,
+    listing close matches when there are any.
+    """
+    suggestions = suggest_names(name)
+    if not suggestions:
+        return "Person not found."
+    return "Person not found. Did you mean: " + ", ".join(
+        person_record(min(names[match]))["name"] for match in suggestions
+    ) + "?"
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -169,5 +569,32 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def all_person_ids():
+    """
+    Returns a list of every person_id, in the order of people.csv.
+    """
+    if graph is not None:
+        return list(graph.person_ids)
+    return list(people)
+
+
+def person_record(person_id):
+    """
+    Returns a dictionary with at least the name and birth of a person.
+    """
+    if graph is not None:
+        return graph.person(person_id)
+    return people[person_id]
+
+
+def movie_record(movie_id):
+    """
+    Returns a dictionary with at least the title and year of a movie.
+    """
+    if graph is not None:
+        return graph.movie(movie_id)
+    return movies[movie_id]
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,121 @@
+import argparse
+import csv
+import os
+import random
+import sys
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael",
+    "Linda", "William", "Elizabeth", "David", "Barbara", "Richard", "Susan",
+    "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen", "Daniel",
+    "Nancy", "Matthew", "Lisa", "Anthony", "Betty", "Mark", "Margaret",
+    "Donald", "Sandra", "Steven", "Ashley", "Paul", "Kimberly", "Andrew",
+    "Emily", "Joshua", "Donna", "Kenneth", "Michelle", "Kevin", "Carol",
+    "Brian", "Amanda", "George", "Dorothy", "Timothy", "Melissa", "Ronald",
+    "Deborah", "Edward", "Stephanie", "Jason", "Rebecca", "Jeffrey", "Sharon"
+]
+
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller",
+    "Davis", "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez",
+    "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark",
+    "Ramirez", "Lewis", "Robinson", "Walker", "Young", "Allen", "King",
+    "Wright", "Scott", "Torres", "Nguyen", "Hill", "Flores", "Green",
+    "Adams", "Nelson", "Baker", "Hall", "Rivera", "Campbell", "Mitchell",
+    "Carter", "Roberts", "Gomez", "Phillips", "Evans", "Turner", "Diaz"
+]
+
+TITLE_WORDS = [
+    "Night", "Return", "Last", "City", "Dark", "Love", "Star", "Secret",
+    "River", "Dream", "Fire", "Lost", "Game", "Road", "Shadow", "King",
+    "Storm", "House", "Wild", "Silent", "Blue", "Iron", "Golden", "Edge"
+]
+
+
+def person_rows(people, seed):
+    """
+    Yields (id, name, birth) rows for people people. Names repeat
+    across people, as they do in the IMDb data.
+    """
+    rng = random.Random(seed)
+    for i in range(people):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        if rng.random() < 0.5:
+            name += f" {rng.choice(LAST_NAMES)}"
+        birth = str(rng.randint(1900, 2010)) if rng.random() < 0.8 else ""
+        yield str(i + 1), name, birth
+
+
+def movie_rows(movies, seed):
+    """
+    Yields (id, title, year) rows for movies movies.
+    """
+    rng = random.Random(seed + 1)
+    for i in range(movies):
+        title = " ".join(rng.choices(TITLE_WORDS, k=rng.randint(1, 3)))
+        yield str(i + 1), title, str(rng.randint(1920, 2025))
+
+
+def star_rows(people, movies, seed, cast_alpha=1.5, max_cast=100, skew=2.0):
+    """
+    Yields (person_id, movie_id) rows linking people to movies.
+
+    Cast sizes follow a Pareto distribution with shape cast_alpha,
+    shifted up by one and capped at max_cast. Cast members are drawn
+    so that the chance of picking person i falls off as a power law
+    in i (controlled by skew), giving a few hub actors and a long tail.
+    """
+    rng = random.Random(seed + 2)
+    for movie in range(movies):
+        cast_size = min(int(rng.paretovariate(cast_alpha)) + 1, max_cast)
+        cast = {int(people * rng.random() ** skew) for _ in range(cast_size)}
+        for person in sorted(cast):
+            yield str(person + 1), str(movie + 1)
+
+
+def generate(directory, people, movies, seed, cast_alpha=1.5, max_cast=100, skew=2.0):
+    """
+    Writes people.csv, movies.csv and stars.csv to directory in the
+    schema `degrees.load_data` reads, streaming rows so that memory
+    use does not grow with the dataset.
+    """
+    os.makedirs(directory, exist_ok=True)
+    files = [
+        ("people.csv", ["id", "name", "birth"], person_rows(people, seed)),
+        ("movies.csv", ["id", "title", "year"], movie_rows(movies, seed)),
+        ("stars.csv", ["person_id", "movie_id"],
+         star_rows(people, movies, seed, cast_alpha, max_cast, skew))
+    ]
+    for filename, header, rows in files:
+        with open(os.path.join(directory, filename), "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic degrees dataset."
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--people", type=int, default=10000)
+    parser.add_argument("--movies", type=int,
+                        help="number of movies (default: people / 3, as in the IMDb data)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cast-alpha", type=float, default=1.5,
+                        help="Pareto shape of cast sizes; lower means larger casts")
+    parser.add_argument("--max-cast", type=int, default=100)
+    parser.add_argument("--skew", type=float, default=2.0,
+                        help="power-law skew of actor popularity; 1 is uniform")
+    args = parser.parse_args()
+
+    movies = args.movies if args.movies is not None else max(args.people // 3, 1)
+    generate(args.directory, args.people, movies, args.seed,
+             args.cast_alpha, args.max_cast, args.skew)
+    print(f"Wrote {args.people} people and {movies} movies to {args.directory}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
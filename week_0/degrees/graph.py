@@ -0,0 +1,259 @@
+from array import array
+from itertools import accumulate
+
+from ingest import LoadReport, read_sources
+from util import SearchStats
+
+
+class CompactGraph():
+    """
+    Integer-indexed store for the person-movie graph.
+
+    IMDb ids are interned to dense ints, and the bipartite graph is
+    held as two CSR (offset + index) array pairs: one from people to
+    the movies they starred in, and one from movies to their stars.
+    """
+
+    def __init__(self):
+        self.person_ids = []
+        self.person_index = {}
+        self.person_names = []
+        self.person_births = []
+
+        self.movie_ids = []
+        self.movie_index = {}
+        self.movie_titles = []
+        self.movie_years = []
+
+        self.person_offsets = array("i", [0])
+        self.person_movies = array("i")
+        self.movie_offsets = array("i", [0])
+        self.movie_stars = array("i")
+
+        # Maps lowercase names to sets of person_ids, when read from a snapshot
+        self.names = None
+
+    @classmethod
+    def from_csv(cls, directory, report=None):
+        """
+        Builds a graph directly from a degrees dataset directory,
+        streaming each CSV file in chunks and recording them in report.
+        """
+        if report is None:
+            report = LoadReport()
+        return cls.from_sources(read_sources(directory, report), report)
+
+    @classmethod
+    def from_sources(cls, sources, report):
+        """
+        Builds a graph from the row chunks of each CSV file,
+        as returned by read_sources.
+        """
+        graph = cls()
+
+        for chunk in sources["people.csv"]:
+            for person_id, name, birth in chunk:
+                graph.add_person(person_id, name, birth)
+            report.record("people.csv", len(chunk))
+
+        for chunk in sources["movies.csv"]:
+            for movie_id, title, year in chunk:
+                graph.add_movie(movie_id, title, year)
+            report.record("movies.csv", len(chunk))
+
+        edge_people = array("i")
+        edge_movies = array("i")
+        person_index = graph.person_index
+        movie_index = graph.movie_index
+        for chunk in sources["stars.csv"]:
+            rejected = 0
+            for person_id, movie_id in chunk:
+                person = person_index.get(person_id)
+                movie = movie_index.get(movie_id)
+                if person is None or movie is None:
+                    rejected += 1
+                    continue
+                edge_people.append(person)
+                edge_movies.append(movie)
+            report.record("stars.csv", len(chunk) - rejected, rejected)
+
+        graph.build(edge_people, edge_movies)
+        return graph
+
+    def add_person(self, person_id, name, birth):
+        """
+        Interns a person and returns their integer index.
+        """
+        index = self.person_index.get(person_id)
+        if index is None:
+            index = len(self.person_ids)
+            self.person_index[person_id] = index
+            self.person_ids.append(person_id)
+            self.person_names.append(name)
+            self.person_births.append(birth)
+        return index
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Interns a movie and returns its integer index.
+        """
+        index = self.movie_index.get(movie_id)
+        if index is None:
+            index = len(self.movie_ids)
+            self.movie_index[movie_id] = index
+            self.movie_ids.append(movie_id)
+            self.movie_titles.append(title)
+            self.movie_years.append(year)
+        return index
+
+    def build(self, edge_people, edge_movies):
+        """
+        Fills both CSR arrays from parallel arrays of
+        (person index, movie index) edges.
+        """
+        self.person_offsets, self.person_movies = _csr(
+            len(self.person_ids), edge_people, edge_movies
+        )
+        self.movie_offsets, self.movie_stars = _csr(
+            len(self.movie_ids), edge_movies, edge_people
+        )
+
+    def person(self, person_id):
+        """
+        Returns a dictionary with the name and birth of a person.
+        """
+        index = self.person_index[person_id]
+        return {
+            "name": self.person_names[index],
+            "birth": self.person_births[index]
+        }
+
+    def movie(self, movie_id):
+        """
+        Returns a dictionary with the title and year of a movie.
+        """
+        index = self.movie_index[movie_id]
+        return {
+            "title": self.movie_titles[index],
+            "year": self.movie_years[index]
+        }
+
+    def neighbor_indices(self, person):
+        """
+        Yields (movie index, person index) pairs for people who
+        starred with the person at the given index.
+        """
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+        for i in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[i]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_stars[j]
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        movie_ids = self.movie_ids
+        person_ids = self.person_ids
+        return {
+            (movie_ids[movie], person_ids[person])
+            for movie, person in self.neighbor_indices(self.person_index[person_id])
+        }
+
+    def breadth_first_search(self, source, target, stats=None):
+        """
+        Breadth-first search over integer indices.
+
+        Returns a (path, stats) tuple, where path is a list of
+        (movie_id, person_id) pairs or None if not connected, and
+        stats is the SearchStats that was filled in.
+        """
+        if stats is None:
+            stats = SearchStats()
+        if source == target:
+            return [], stats
+        paths, stats = self.shortest_paths_from(source, [target], stats)
+        return paths[target], stats
+
+    def shortest_paths_from(self, source, targets, stats=None):
+        """
+        Runs a single breadth-first search from source that stops
+        once every target has been reached.
+
+        Returns a (paths, stats) tuple, where paths maps each target
+        to its path from source, or to None if not connected.
+        """
+        if stats is None:
+            stats = SearchStats()
+
+        with stats.phase("setup"):
+            start = self.person_index[source]
+            goals = {self.person_index[target] for target in targets}
+            parent_person = array("i", [-1]) * len(self.person_ids)
+            parent_movie = array("i", [-1]) * len(self.person_ids)
+            parent_person[start] = start
+            remaining = len(goals - {start})
+            frontier = [start]
+
+        with stats.phase("search"):
+            edges_scanned = 0
+            while frontier and remaining:
+                next_frontier = []
+                waiting = len(frontier)
+                for person in frontier:
+                    waiting -= 1
+                    stats.expand(self.person_ids[person], waiting + len(next_frontier))
+                    for movie, neighbor in self.neighbor_indices(person):
+                        edges_scanned += 1
+                        if parent_person[neighbor] != -1:
+                            continue
+                        parent_person[neighbor] = person
+                        parent_movie[neighbor] = movie
+                        next_frontier.append(neighbor)
+                        if neighbor in goals:
+                            remaining -= 1
+                    if not remaining:
+                        break
+                frontier = next_frontier
+            stats.edges_scanned += edges_scanned
+
+        with stats.phase("path"):
+            paths = {}
+            for target in targets:
+                goal = self.person_index[target]
+                if parent_person[goal] == -1:
+                    paths[target] = None
+                else:
+                    paths[target] = self._path(parent_person, parent_movie, start, goal)
+        return paths, stats
+
+    def _path(self, parent_person, parent_movie, start, goal):
+        path = []
+        person = goal
+        while person != start:
+            path.append((self.movie_ids[parent_movie[person]], self.person_ids[person]))
+            person = parent_person[person]
+        path.reverse()
+        return path
+
+
+def _csr(size, sources, targets):
+    """
+    Returns (offsets, indices) arrays grouping targets by source.
+    """
+    counts = array("i", [0]) * size
+    for source in sources:
+        counts[source] += 1
+    offsets = array("i", [0])
+    offsets.extend(accumulate(counts))
+
+    cursor = array("i", offsets[:-1])
+    indices = array("i", [0]) * len(targets)
+    for source, target in zip(sources, targets):
+        indices[cursor[source]] = target
+        cursor[source] += 1
+    return offsets, indices
@@ -0,0 +1,151 @@
+import csv
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+CHUNK_SIZE = 50000
+
+
+class LoadReport():
+    """
+    Counts accepted and rejected rows per file while a dataset loads,
+    reports progress, and enforces an optional peak memory cap.
+
+    `progress`, if given, is called after every chunk as
+    progress(filename, rows, rows_per_second).
+    `max_memory` is a cap, in bytes, on how much the resident size of
+    the process grows from when the report is created; loading stops
+    with MemoryError once it is exceeded.
+    """
+    def __init__(self, progress=None, max_memory=None):
+        self.progress = progress
+        self.max_memory = max_memory
+        self.rows = {}
+        self.rejected = {}
+        self.start = time.perf_counter()
+        self.file_starts = {}
+        self.baseline = current_memory()
+
+    def begin(self, filename):
+        """
+        Marks the start of reading filename, for its rows/sec rate.
+        """
+        self.file_starts[filename] = time.perf_counter()
+        self.rows.setdefault(filename, 0)
+        self.rejected.setdefault(filename, 0)
+
+    def record(self, filename, accepted, rejected=0):
+        """
+        Records a processed chunk of filename, then reports progress
+        and checks the memory cap.
+        """
+        now = time.perf_counter()
+        self.rows[filename] = self.rows.get(filename, 0) + accepted
+        self.rejected[filename] = self.rejected.get(filename, 0) + rejected
+
+        if self.progress is not None:
+            rows = self.rows[filename] + self.rejected[filename]
+            elapsed = now - self.file_starts.get(filename, self.start)
+            self.progress(filename, rows, rows / elapsed if elapsed else 0.0)
+
+        if self.max_memory is not None:
+            used = self.memory_used()
+            if used is not None and used > self.max_memory:
+                raise MemoryError(
+                    f"loading used {used} bytes, over the cap of {self.max_memory} bytes"
+                )
+
+    def memory_used(self):
+        """
+        Returns how many bytes the resident size has grown since the
+        report was created, or None where it cannot be measured.
+        """
+        memory = current_memory()
+        if memory is None or self.baseline is None:
+            return None
+        return max(memory - self.baseline, 0)
+
+    def total_rejected(self):
+        return sum(self.rejected.values())
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+
+def read_chunks(path, fields, report=None, chunk_size=CHUNK_SIZE):
+    """
+    Yields lists of at most chunk_size rows of the CSV file at path,
+    each row a tuple of exactly `fields` strings.
+
+    The header is skipped. Rows with the wrong number of fields are
+    counted as rejected in report rather than yielded; the caller
+    records each chunk it processes with report.record.
+    """
+    filename = os.path.basename(path)
+    if report is not None:
+        report.begin(filename)
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        chunk = []
+        for row in reader:
+            if len(row) != fields:
+                if report is not None:
+                    report.rejected[filename] += 1
+                continue
+            chunk.append(tuple(row))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def read_sources(directory, report=None):
+    """
+    Returns a dictionary mapping each of people.csv, movies.csv and
+    stars.csv to an iterable of row chunks, as from read_chunks.
+    """
+    layout = {"people.csv": 3, "movies.csv": 3, "stars.csv": 2}
+    return {
+        filename: read_chunks(os.path.join(directory, filename), fields, report)
+        for filename, fields in layout.items()
+    }
+
+
+def peak_memory():
+    """
+    Returns the peak resident set size of this process in bytes,
+    or None where it cannot be measured.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_memory():
+    """
+    Returns the resident set size of this process in bytes. Where
+    only the peak can be measured, returns the peak instead, or None
+    where neither can.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return peak_memory()
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def print_progress(filename, rows, rate):
+    """
+    Progress callback that prints a single updating line to stderr.
+    """
+    print(f"\r{filename}: {rows} rows ({rate:.0f} rows/sec)", end="", file=sys.stderr)
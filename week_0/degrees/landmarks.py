@@ -0,0 +1,352 @@
+import json
+import math
+import os
+import struct
+from array import array
+from itertools import accumulate
+
+from snapshot import source_stamp
+from util import SearchStats
+
+MAGIC = b"DEGLAND\0"
+VERSION = 1
+PREFIX = struct.Struct("<II")
+
+# Distances are stored in one byte; UNREACHABLE marks other components
+UNREACHABLE = 255
+
+
+class LandmarkIndex():
+    """
+    Precomputed BFS distances from a few hub actors ("landmarks")
+    to every person of a CompactGraph, used to bound degrees of
+    separation without searching, and to prune the searches that
+    are still needed.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.landmarks = []
+        self.distances = []
+
+    def add_landmarks(self, count):
+        """
+        Adds landmarks until there are count of them, picking the
+        best-connected people that are not next to an existing one.
+        Existing landmarks and their distances are kept.
+        """
+        if len(self.landmarks) >= count:
+            return
+        degrees = self._degrees()
+        candidates = sorted(range(len(degrees)), key=degrees.__getitem__, reverse=True)
+        for person in candidates:
+            if len(self.landmarks) >= count:
+                break
+            if any(distances[person] <= 1 for distances in self.distances):
+                continue
+            self.landmarks.append(self.graph.person_ids[person])
+            self.distances.append(self._distances_from(person))
+
+    def _degrees(self):
+        # Co-star count of every person, read off the CSR offsets as
+        # the summed cast sizes of their movies
+        graph = self.graph
+        movie_offsets = graph.movie_offsets
+        cast_sizes = [
+            movie_offsets[movie + 1] - movie_offsets[movie]
+            for movie in range(len(graph.movie_ids))
+        ]
+        totals = array("q", [0])
+        totals.extend(accumulate(cast_sizes[movie] for movie in graph.person_movies))
+        person_offsets = graph.person_offsets
+        return [
+            totals[person_offsets[person + 1]] - totals[person_offsets[person]]
+            for person in range(len(graph.person_ids))
+        ]
+
+    def _distances_from(self, landmark):
+        # Distances past UNREACHABLE - 1 are clamped, far beyond the
+        # diameter of any real co-star graph
+        graph = self.graph
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_stars = graph.movie_stars
+
+        distances = array("B", [UNREACHABLE]) * len(graph.person_ids)
+        distances[landmark] = 0
+
+        # Every star of a movie is found the first time the movie is
+        # reached, so each cast is scanned only once
+        seen_movies = bytearray(len(graph.movie_ids))
+        frontier = [landmark]
+        depth = 0
+        while frontier:
+            depth = min(depth + 1, UNREACHABLE - 1)
+            next_frontier = []
+            for person in frontier:
+                for i in range(person_offsets[person], person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    if seen_movies[movie]:
+                        continue
+                    seen_movies[movie] = 1
+                    for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                        star = movie_stars[j]
+                        if distances[star] == UNREACHABLE:
+                            distances[star] = depth
+                            next_frontier.append(star)
+            frontier = next_frontier
+        return distances
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation
+        between source and target. lower is math.inf if they are
+        known not to be connected, and upper is math.inf if no
+        landmark reaches both.
+        """
+        if source == target:
+            return 0, 0
+        person_index = self.graph.person_index
+        return self._bounds(person_index[source], person_index[target])
+
+    def _bounds(self, s, t):
+        lower = 1
+        upper = math.inf
+        for distances in self.distances:
+            ds = distances[s]
+            dt = distances[t]
+            if ds == UNREACHABLE and dt == UNREACHABLE:
+                continue
+            if ds == UNREACHABLE or dt == UNREACHABLE:
+                return math.inf, math.inf
+            lower = max(lower, abs(ds - dt))
+            upper = min(upper, ds + dt)
+        return lower, upper
+
+    def separation(self, source, target):
+        """
+        Returns the exact degrees of separation between source and
+        target, or None if they are not connected. Bounds are used
+        directly when they agree, and to prune the search otherwise.
+        """
+        lower, upper = self.bounds(source, target)
+        if lower == math.inf:
+            return None
+        if lower == upper:
+            return lower
+        path = self.shortest_path(source, target)
+        return None if path is None else len(path)
+
+    def shortest_path(self, source, target):
+        """
+        Returns a shortest path in the same format as
+        `degrees.shortest_path`, found by a pruned search.
+        """
+        path, _ = self.search(source, target)
+        return path
+
+    def search(self, source, target, stats=None):
+        """
+        Bidirectional breadth-first search over graph indices that
+        skips every person whose landmark lower bound shows they
+        cannot be on a path of at most the landmark upper bound.
+
+        The bound for each person comes from a single landmark, the
+        one that best separates source from target, so pruning costs
+        two array lookups per person.
+
+        Returns a (path, stats) tuple like `degrees.search`.
+        """
+        if stats is None:
+            stats = SearchStats()
+        if source == target:
+            return [], stats
+
+        graph = self.graph
+        s = graph.person_index[source]
+        t = graph.person_index[target]
+        with stats.phase("setup"):
+            lower, limit = self._bounds(s, t)
+            if lower == math.inf:
+                return None, stats
+            row = None
+            best_gap = -1
+            for distances in self.distances:
+                if distances[s] != UNREACHABLE and abs(distances[s] - distances[t]) > best_gap:
+                    row = distances
+                    best_gap = abs(distances[s] - distances[t])
+
+            # Each side maps person -> (movie, previous person, depth)
+            forward = {s: (-1, -1, 0)}
+            backward = {t: (-1, -1, 0)}
+            forward_movies = set()
+            backward_movies = set()
+            forward_frontier = [s]
+            backward_frontier = [t]
+
+        person_offsets = graph.person_offsets
+        person_movies = graph.person_movies
+        movie_offsets = graph.movie_offsets
+        movie_stars = graph.movie_stars
+
+        best = None
+        with stats.phase("search"):
+            edges_scanned = 0
+            while best is None and forward_frontier and backward_frontier:
+
+                # Expand one whole layer of the smaller side, bounding
+                # each person's distance to the far end of the search
+                if len(forward_frontier) <= len(backward_frontier):
+                    frontier, parents, other = forward_frontier, forward, backward
+                    seen_movies, anchor = forward_movies, t
+                else:
+                    frontier, parents, other = backward_frontier, backward, forward
+                    seen_movies, anchor = backward_movies, s
+                depth = parents[frontier[0]][2] + 1
+                if row is not None:
+                    anchor = row[anchor]
+
+                next_frontier = []
+                waiting = len(forward_frontier) + len(backward_frontier)
+                for person in frontier:
+                    waiting -= 1
+                    stats.expand(graph.person_ids[person], waiting + len(next_frontier))
+                    for i in range(person_offsets[person], person_offsets[person + 1]):
+                        movie = person_movies[i]
+                        if movie in seen_movies:
+                            continue
+                        seen_movies.add(movie)
+                        edges_scanned += movie_offsets[movie + 1] - movie_offsets[movie]
+                        for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                            star = movie_stars[j]
+                            if star in parents:
+                                continue
+                            if row is not None and depth + abs(row[star] - anchor) > limit:
+                                continue
+                            parents[star] = (movie, person, depth)
+                            next_frontier.append(star)
+                            if star in other:
+                                length = depth + other[star][2]
+                                if best is None or length < best[0]:
+                                    best = (length, star)
+
+                if frontier is forward_frontier:
+                    forward_frontier = next_frontier
+                else:
+                    backward_frontier = next_frontier
+            stats.edges_scanned += edges_scanned
+
+        if best is None:
+            return None, stats
+        with stats.phase("path"):
+            path = self._join(forward, backward, best[1], s, t)
+        return path, stats
+
+    def _join(self, forward, backward, meeting, s, t):
+        movie_ids = self.graph.movie_ids
+        person_ids = self.graph.person_ids
+        path = []
+        person = meeting
+        while person != s:
+            movie, previous, _ = forward[person]
+            path.append((movie_ids[movie], person_ids[person]))
+            person = previous
+        path.reverse()
+
+        person = meeting
+        while person != t:
+            movie, following, _ = backward[person]
+            path.append((movie_ids[movie], person_ids[following]))
+            person = following
+        return path
+
+    def save(self, directory):
+        """
+        Writes the index next to the dataset in directory.
+        """
+        header = json.dumps({
+            "sources": source_stamp(directory),
+            "people": len(self.graph.person_ids),
+            "landmarks": self.landmarks
+        }).encode("utf-8")
+        path = index_path(directory)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(MAGIC)
+            f.write(PREFIX.pack(VERSION, len(header)))
+            f.write(header)
+            for distances in self.distances:
+                distances.tofile(f)
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, directory, graph):
+        """
+        Returns the index saved in directory for graph, or None if
+        there is none or the dataset has changed since it was built.
+        """
+        try:
+            f = open(index_path(directory), "rb")
+        except FileNotFoundError:
+            return None
+
+        # A damaged file makes the index stale rather than fatal, so
+        # that load_landmarks rebuilds and saves it again
+        with f:
+            try:
+                return cls._read(f, directory, graph)
+            except (ValueError, EOFError, struct.error, KeyError, TypeError):
+                return None
+
+    @classmethod
+    def _read(cls, f, directory, graph):
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        version, header_length = PREFIX.unpack(f.read(PREFIX.size))
+        if version != VERSION:
+            return None
+        header = json.loads(f.read(header_length))
+        if header["sources"] != source_stamp(directory):
+            return None
+        people = len(graph.person_ids)
+        if header["people"] != people:
+            return None
+        landmarks = header["landmarks"]
+        size = len(MAGIC) + PREFIX.size + header_length + people * len(landmarks)
+        if os.fstat(f.fileno()).st_size != size:
+            return None
+        if any(landmark not in graph.person_index for landmark in landmarks):
+            return None
+
+        index = cls(graph)
+        for landmark in landmarks:
+            distances = array("B")
+            distances.fromfile(f, people)
+            index.landmarks.append(landmark)
+            index.distances.append(distances)
+        return index
+
+
+def index_path(directory):
+    return os.path.join(directory, "degrees.landmarks")
+
+
+def load_landmarks(directory, graph, count=16):
+    """
+    Returns a LandmarkIndex with at least count landmarks for graph,
+    the CompactGraph loaded from directory.
+
+    A saved index is reused if the dataset has not changed; if it
+    has too few landmarks, only the missing ones are computed.
+    The index is saved again whenever it changes.
+    """
+    index = LandmarkIndex.load(directory, graph)
+    if index is None:
+        index = LandmarkIndex(graph)
+    if len(index.landmarks) < count:
+        index.add_landmarks(count)
+        try:
+            index.save(directory)
+        except OSError:
+            pass
+    return index
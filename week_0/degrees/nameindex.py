@@ -0,0 +1,79 @@
+import heapq
+from collections import Counter
+from array import array
+from bisect import bisect_left
+
+# Query trigrams used to gather candidates, rarest first
+CANDIDATE_TRIGRAMS = 6
+
+# Candidates scored exactly: at least SHORTLIST_MIN, or k times SHORTLIST_FACTOR
+SHORTLIST_MIN = 200
+SHORTLIST_FACTOR = 20
+
+
+class NameIndex():
+    """
+    Prefix and trigram index over lowercase names, for autocomplete
+    and ranked fuzzy lookup of misspelled names.
+    """
+
+    def __init__(self, names):
+        self.keys = sorted(names)
+        self.trigrams = {}
+        for index, key in enumerate(self.keys):
+            for gram in trigrams(key):
+                postings = self.trigrams.get(gram)
+                if postings is None:
+                    self.trigrams[gram] = array("i", [index])
+                else:
+                    postings.append(index)
+
+    def complete(self, prefix, k=10):
+        """
+        Returns up to k names starting with prefix, in sorted order.
+        """
+        prefix = prefix.lower()
+        result = []
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and len(result) < k and self.keys[i].startswith(prefix):
+            result.append(self.keys[i])
+            i += 1
+        return result
+
+    def search(self, query, k=10):
+        """
+        Returns up to k (name, score) pairs ranked by trigram
+        similarity to query, best first. Scores are between 0 and 1.
+        """
+        grams = trigrams(query.lower())
+        if not grams:
+            return []
+
+        # Gather candidates from the rarest query trigrams only, so
+        # common trigrams such as " jo" do not dominate the cost
+        known = sorted(
+            (gram for gram in grams if gram in self.trigrams),
+            key=lambda gram: len(self.trigrams[gram])
+        )
+        counts = Counter()
+        for gram in known[:CANDIDATE_TRIGRAMS]:
+            counts.update(self.trigrams[gram])
+
+        # Rank the best-covered candidates by Jaccard similarity
+        # of their trigram sets
+        scored = []
+        for index, _ in counts.most_common(max(k * SHORTLIST_FACTOR, SHORTLIST_MIN)):
+            other = trigrams(self.keys[index])
+            common = len(grams & other)
+            scored.append((common / (len(grams) + len(other) - common), index))
+        best = heapq.nlargest(k, scored)
+        return [(self.keys[index], score) for score, index in best]
+
+
+def trigrams(text):
+    """
+    Returns the set of trigrams of text, padded so that the start
+    and end of each word count as well.
+    """
+    padded = f"  {' '.join(text.split())} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
@@ -0,0 +1,141 @@
+import argparse
+import json
+import multiprocessing
+import socketserver
+import sys
+
+import degrees
+
+
+def answer(request):
+    """
+    Answers one query given as a dictionary with `source` and
+    `target` person ids, and optionally `bidirectional` and `id`.
+
+    Returns a JSON-serializable response dictionary.
+    """
+    response = {"id": request.get("id")}
+    try:
+        source = str(request["source"])
+        target = str(request["target"])
+    except (KeyError, TypeError):
+        response["error"] = "request needs a source and a target"
+        return response
+
+    for person_id in (source, target):
+        try:
+            degrees.person_record(person_id)
+        except KeyError:
+            response["error"] = f"unknown person id {person_id}"
+            return response
+
+    path = degrees.cached_shortest_path(
+        source, target, bidirectional=bool(request.get("bidirectional"))
+    )
+    response["degrees"] = None if path is None else len(path)
+    response["path"] = path
+    return response
+
+
+def answer_line(line):
+    """
+    Answers one JSON-encoded request line with a JSON-encoded response.
+    """
+    try:
+        request = json.loads(line)
+    except json.JSONDecodeError as e:
+        return json.dumps({"id": None, "error": f"invalid JSON: {e}"})
+    if not isinstance(request, dict):
+        return json.dumps({"id": None, "error": "request must be an object"})
+    return json.dumps(answer(request))
+
+
+def create_pool(directory, workers):
+    """
+    Returns a process pool of workers sharing the loaded graph.
+
+    With fork, workers inherit the graph copy-on-write. Otherwise
+    each worker loads it from the memory-mapped snapshot.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork").Pool(workers)
+    return multiprocessing.Pool(
+        workers, initializer=degrees.load_data,
+        initargs=(directory, False, True)
+    )
+
+
+def serve_stdin(pool, infile=sys.stdin, outfile=sys.stdout):
+    """
+    Answers JSON-lines requests from infile, in order, on outfile.
+    """
+    lines = (line for line in infile if line.strip())
+    if pool is None:
+        results = map(answer_line, lines)
+    else:
+        results = pool.imap(answer_line, lines)
+    for result in results:
+        outfile.write(result + "\n")
+        outfile.flush()
+
+
+def serve_socket(pool, host, port):
+    """
+    Answers JSON-lines requests on a local TCP socket until interrupted.
+
+    Each connection is handled on its own thread, and queries from
+    all connections are answered by the shared pool.
+    """
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                if pool is None:
+                    result = answer_line(line)
+                else:
+                    result = pool.apply(answer_line, (line,))
+                self.wfile.write(result.encode("utf-8") + b"\n")
+
+    class Server(socketserver.ThreadingTCPServer):
+        allow_reuse_address = True
+        daemon_threads = True
+
+    with Server((host, port), Handler) as server:
+        print(f"Listening on {host}:{server.server_address[1]}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer degrees queries as JSON lines."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes (default: 1)")
+    parser.add_argument("--port", type=int,
+                        help="listen on this local TCP port instead of stdin")
+    parser.add_argument("--host", default="127.0.0.1")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, snapshot=True)
+    print("Data loaded.", file=sys.stderr)
+
+    pool = create_pool(args.directory, args.workers) if args.workers > 1 else None
+    try:
+        if args.port is None:
+            serve_stdin(pool)
+        else:
+            serve_socket(pool, args.host, args.port)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+if __name__ == "__main__":
+    main()
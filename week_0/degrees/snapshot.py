@@ -0,0 +1,291 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+
+from graph import CompactGraph
+
+MAGIC = b"DEGSNAP\0"
+VERSION = 2
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Snapshot file layout:
+#   MAGIC, then <version, header length> as two little-endian uint32,
+#   then a JSON header, then 8-byte aligned sections. A string section
+#   is count + 1 int64 offsets followed by the UTF-8 text they index.
+PREFIX = struct.Struct("<II")
+
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars")
+STRINGS = (
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years"
+)
+
+# Lookup sections, so that nothing is rebuilt at startup: the id
+# tables in sorted order, and the people under each lowercase name
+LOOKUPS = ("person_order", "movie_order", "name_keys", "name_offsets", "name_people")
+
+
+class StringTable():
+    """
+    Read-only sequence over a string section, decoding each string
+    only when it is accessed.
+    """
+
+    def __init__(self, text, offsets):
+        self.text = text
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError("string table index out of range")
+        index %= len(self)
+        return str(self.text[self.offsets[index]:self.offsets[index + 1]], "utf-8")
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+class SortedIndex():
+    """
+    Read-only mapping from the strings of a StringTable to their
+    positions, found by binary search over the positions in sorted
+    string order.
+    """
+
+    def __init__(self, strings, order):
+        self.strings = strings
+        self.order = order
+
+    def __len__(self):
+        return len(self.order)
+
+    def get(self, key, default=None):
+        i = bisect_left(self.order, key, key=self.strings.__getitem__)
+        if i < len(self.order) and self.strings[self.order[i]] == key:
+            return self.order[i]
+        return default
+
+    def __getitem__(self, key):
+        index = self.get(key)
+        if index is None:
+            raise KeyError(key)
+        return index
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+
+class NameTable():
+    """
+    Read-only mapping from lowercase names to sets of person_ids,
+    like the `names` dictionary of degrees, over the sorted name
+    keys of a snapshot.
+    """
+
+    def __init__(self, keys, offsets, people, person_ids):
+        self.keys = keys
+        self.offsets = offsets
+        self.people = people
+        self.person_ids = person_ids
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def get(self, name, default=None):
+        i = bisect_left(self.keys, name)
+        if i == len(self.keys) or self.keys[i] != name:
+            return default
+        return {
+            self.person_ids[person]
+            for person in self.people[self.offsets[i]:self.offsets[i + 1]]
+        }
+
+    def __getitem__(self, name):
+        person_ids = self.get(name)
+        if person_ids is None:
+            raise KeyError(name)
+        return person_ids
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+
+def snapshot_path(directory):
+    """
+    Returns the path of the snapshot file for a dataset directory.
+    """
+    return os.path.join(directory, "degrees.snapshot")
+
+
+def source_stamp(directory):
+    """
+    Returns the (mtime, size) of every CSV file a snapshot depends on.
+    """
+    stamp = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        stamp[filename] = [stat.st_mtime_ns, stat.st_size]
+    return stamp
+
+
+def save_snapshot(graph, directory):
+    """
+    Writes graph to the snapshot file of directory, replacing any
+    previous snapshot atomically.
+    """
+    sections = []
+    for name in ARRAYS:
+        sections.append(_int_section(name, getattr(graph, name)))
+    for name in STRINGS:
+        sections.append(_string_section(name, getattr(graph, name)))
+
+    person_ids = graph.person_ids
+    lowered = [name.lower() for name in graph.person_names]
+    people = sorted(range(len(lowered)), key=lowered.__getitem__)
+    keys = []
+    offsets = []
+    for i, person in enumerate(people):
+        if not keys or lowered[person] != keys[-1]:
+            keys.append(lowered[person])
+            offsets.append(i)
+    offsets.append(len(people))
+    sections.append(_int_section(
+        "person_order", sorted(range(len(person_ids)), key=person_ids.__getitem__)
+    ))
+    sections.append(_int_section(
+        "movie_order", sorted(range(len(graph.movie_ids)), key=graph.movie_ids.__getitem__)
+    ))
+    sections.append(_string_section("name_keys", keys))
+    sections.append(_int_section("name_offsets", offsets))
+    sections.append(_int_section("name_people", people))
+
+    header = {
+        "byteorder": sys.byteorder,
+        "sources": source_stamp(directory),
+        "sections": []
+    }
+    offset = 0
+    for name, kind, count, data in sections:
+        header["sections"].append([name, kind, count, offset, len(data)])
+        offset += _padded(len(data))
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    path = snapshot_path(directory)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(PREFIX.pack(VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (_padded(f.tell()) - f.tell()))
+        for _, _, _, data in sections:
+            f.write(data)
+            f.write(b"\0" * (_padded(len(data)) - len(data)))
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(directory):
+    """
+    Returns the CompactGraph stored in the snapshot of directory,
+    or None if there is no snapshot or it is stale.
+
+    Integer arrays are memory-mapped rather than copied, strings
+    are decoded on access, and the id and name lookups are read
+    from the snapshot instead of being rebuilt.
+    """
+    path = snapshot_path(directory)
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+    with f:
+        if os.fstat(f.fileno()).st_size < len(MAGIC) + PREFIX.size:
+            return None
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if data[:len(MAGIC)] != MAGIC:
+        return None
+    version, header_length = PREFIX.unpack_from(data, len(MAGIC))
+    if version != VERSION:
+        return None
+
+    # A damaged header or section makes the snapshot stale rather
+    # than fatal, so that it is rebuilt from the CSV files
+    try:
+        return _read_graph(data, header_length, directory)
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+def _read_graph(data, header_length, directory):
+    start = len(MAGIC) + PREFIX.size
+    header = json.loads(data[start:start + header_length])
+    if header["byteorder"] != sys.byteorder:
+        return None
+    if header["sources"] != source_stamp(directory):
+        return None
+
+    base = _padded(start + header_length)
+    view = memoryview(data)
+    sections = {}
+    for name, kind, count, offset, length in header["sections"]:
+        if name not in ARRAYS + STRINGS + LOOKUPS:
+            return None
+        if offset < 0 or length < 0 or base + offset + length > len(data):
+            return None
+        section = view[base + offset:base + offset + length]
+        if kind == "i":
+            values = section.cast("i")
+        elif kind == "s":
+            split = (count + 1) * 8
+            if length < split:
+                return None
+            offsets = section[:split].cast("q")
+            if offsets[0] != 0 or offsets[-1] != length - split:
+                return None
+            values = StringTable(section[split:], offsets)
+        else:
+            return None
+        if len(values) != count:
+            return None
+        sections[name] = values
+    if set(sections) != set(ARRAYS + STRINGS + LOOKUPS):
+        return None
+
+    graph = CompactGraph()
+    for name in ARRAYS + STRINGS:
+        setattr(graph, name, sections[name])
+    graph.person_index = SortedIndex(graph.person_ids, sections["person_order"])
+    graph.movie_index = SortedIndex(graph.movie_ids, sections["movie_order"])
+    graph.names = NameTable(
+        sections["name_keys"], sections["name_offsets"], sections["name_people"],
+        graph.person_ids
+    )
+    return graph
+
+
+def _int_section(name, values):
+    return (name, "i", len(values), array("i", values).tobytes())
+
+
+def _string_section(name, values):
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = array("q", [0])
+    offsets.extend(accumulate(len(value) for value in encoded))
+    return (name, "s", len(values), offsets.tobytes() + b"".join(encoded))
+
+
+def _padded(size):
+    return (size + 7) & ~7
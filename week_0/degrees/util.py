@@ -1,3 +1,8 @@
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -36,3 +41,163 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class DequeStackFrontier():
+    """
+    Stack frontier that pops in constant time and keeps a count
+    of the states it holds, so contains_state is a hash lookup.
+    """
+    def __init__(self):
+        self.frontier = deque()
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def _pop(self):
+        return self.frontier.pop()
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self._pop()
+            count = self.states[node.state] - 1
+            if count:
+                self.states[node.state] = count
+            else:
+                del self.states[node.state]
+            return node
+
+
+class DequeQueueFrontier(DequeStackFrontier):
+
+    def _pop(self):
+        return self.frontier.popleft()
+
+
+class PathCache():
+    """
+    Bounded LRU cache of shortest paths keyed on the unordered
+    (source, target) pair, so a cached path also answers the reverse
+    query once it has been reversed.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.paths = OrderedDict()
+        self.hits = 0
+        self.reverse_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, source, target):
+        """
+        Returns (True, path) if the pair is cached, else (False, None).
+        Paths are lists of (movie_id, person_id) pairs from source to target.
+        """
+        key = (source, target) if source <= target else (target, source)
+        if key not in self.paths:
+            self.misses += 1
+            return False, None
+        self.paths.move_to_end(key)
+        self.hits += 1
+        path = self.paths[key]
+        if key[0] == source or path is None:
+            return True, path
+        self.reverse_hits += 1
+        return True, reverse_path(key[0], path)
+
+    def put(self, source, target, path):
+        if source <= target:
+            key = (source, target)
+        else:
+            key = (target, source)
+            if path is not None:
+                path = reverse_path(source, path)
+        self.paths[key] = path
+        self.paths.move_to_end(key)
+        while len(self.paths) > self.maxsize:
+            self.paths.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.paths.clear()
+
+    def stats(self):
+        return {
+            "size": len(self.paths),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "reverse_hits": self.reverse_hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+def reverse_path(source, path):
+    """
+    Given a path of (movie_id, person_id) pairs from source, returns
+    the path from its last person back to source.
+    """
+    people = [source] + [person_id for _, person_id in path]
+    return [(path[i][0], people[i]) for i in range(len(path) - 1, -1, -1)]
+
+
+class SearchStats():
+    """
+    Counters and per-phase timings filled in by a search.
+
+    `hook`, if given, is called as hook(state, stats) every time
+    a state is expanded.
+    """
+    def __init__(self, hook=None):
+        self.hook = hook
+        self.nodes_expanded = 0
+        self.edges_scanned = 0
+        self.frontier_peak = 0
+        self.phases = {}
+
+    def expand(self, state, frontier_size):
+        """
+        Records the expansion of state with frontier_size states
+        still waiting in the frontier: every state discovered but not
+        yet expanded, counted once, not including state itself. For
+        layered searches that is the rest of the current layer plus
+        the next layer found so far, on both sides if bidirectional.
+        """
+        self.nodes_expanded += 1
+        if frontier_size > self.frontier_peak:
+            self.frontier_peak = frontier_size
+        if self.hook is not None:
+            self.hook(state, self)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Adds the time spent in the body of the with statement to
+        the named phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def total_time(self):
+        return sum(self.phases.values())
+
+    def as_dict(self):
+        return {
+            "nodes_expanded": self.nodes_expanded,
+            "edges_scanned": self.edges_scanned,
+            "frontier_peak": self.frontier_peak,
+            "phases": dict(self.phases)
+        }
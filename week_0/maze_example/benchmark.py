@@ -0,0 +1,114 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from generate import TOPOLOGIES, generate
+from maze import STRATEGIES, Maze
+
+
+def peak_memory():
+    """
+    Returns the peak resident set size of this process in bytes,
+    or None where it cannot be measured.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def maze_file(directory, topology, size, seed):
+    """
+    Returns the path of a generated size x size maze in directory,
+    generating it first unless it already exists.
+    """
+    filename = os.path.join(directory, f"{topology}-{size}x{size}-{seed}.txt")
+    if not os.path.exists(filename):
+        generate(filename, size, size, topology, seed)
+    return filename
+
+
+def run(filename, strategies, render_limit, cell_size):
+    """
+    Parses, solves with every strategy and renders the maze in
+    filename. Returns (phase, seconds, detail, peak bytes) rows.
+
+    Meant to run in a fresh process, so that the peak resident size
+    reflects this maze only.
+    """
+    rows = []
+
+    start = time.perf_counter()
+    m = Maze(filename)
+    rows.append(("parse", time.perf_counter() - start, f"{m.height * m.width} cells",
+                 peak_memory()))
+
+    for strategy in strategies:
+        m.solution = None
+        start = time.perf_counter()
+        try:
+            m.solve(strategy)
+        except Exception as e:
+            detail = str(e)
+        else:
+            detail = f"explored {m.num_explored}, length {len(m.solution[0])}"
+        rows.append((strategy, time.perf_counter() - start, detail, peak_memory()))
+
+    if m.height * m.width <= render_limit:
+        output = os.path.splitext(filename)[0] + ".png"
+        start = time.perf_counter()
+        m.output_image(output, show_explored=True, cell_size=cell_size,
+                       cell_border=1 if cell_size > 2 else 0)
+        rows.append(("render", time.perf_counter() - start, f"cell size {cell_size}",
+                     peak_memory()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark maze parsing, solving and rendering on generated mazes."
+    )
+    parser.add_argument("sizes", type=int, nargs="*", default=[101, 1001],
+                        help="side lengths of the square mazes (default: 101 1001)")
+    parser.add_argument("--topology", choices=TOPOLOGIES, action="append",
+                        help="topologies to run (default: all)")
+    parser.add_argument("--strategy", choices=STRATEGIES, action="append",
+                        help="strategies to run (default: all)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--directory", default="mazes",
+                        help="where generated mazes are kept between runs")
+    parser.add_argument("--render-limit", type=int, default=4000000,
+                        help="skip rendering mazes with more cells than this")
+    parser.add_argument("--cell-size", type=int, default=4)
+    args = parser.parse_args()
+    topologies = args.topology or list(TOPOLOGIES)
+    strategies = args.strategy or list(STRATEGIES)
+    os.makedirs(args.directory, exist_ok=True)
+
+    for size in args.sizes:
+        for topology in topologies:
+            start = time.perf_counter()
+            filename = maze_file(args.directory, topology, size, args.seed)
+            print(f"{filename}: ready in {time.perf_counter() - start:.3f}s")
+
+            # A new single-worker pool per maze gives each its own process
+            with ProcessPoolExecutor(1) as executor:
+                rows = executor.submit(
+                    run, filename, strategies, args.render_limit, args.cell_size
+                ).result()
+            for phase, seconds, detail, peak in rows:
+                print(f"{topology:>10} {size:>6} {phase:>13}: "
+                      f"{seconds * 1000:10.1f} ms  "
+                      f"peak RSS {(peak or 0) / 2 ** 20:8.1f} MiB  {detail}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import argparse
+import random
+import sys
+from array import array
+
+from maze import GOAL, OPEN, START, WALL
+
+TOPOLOGIES = ("perfect", "open", "obstacles")
+
+# Byte translation table from cell codes to maze file characters
+CELL_CHARS = bytearray(256)
+CELL_CHARS[OPEN] = ord(" ")
+CELL_CHARS[WALL] = ord("#")
+CELL_CHARS[START] = ord("A")
+CELL_CHARS[GOAL] = ord("B")
+CELL_CHARS = bytes(CELL_CHARS)
+
+
+def perfect_maze(height, width, rng):
+    """
+    Returns a grid of cell codes holding a perfect maze (exactly one
+    path between any two open cells), carved by a randomized
+    depth-first search over the cells at odd coordinates.
+    """
+    grid = bytearray([WALL]) * (height * width)
+    first = width + 1
+    grid[first] = OPEN
+
+    # An explicit stack of flat indices, so carving needs no recursion
+    # and only four bytes per cell on the current branch
+    stack = array("i", [first])
+    while stack:
+        index = stack[-1]
+        row, col = divmod(index, width)
+        steps = []
+        if row >= 3 and grid[index - 2 * width] == WALL:
+            steps.append(-width)
+        if row + 2 <= height - 2 and grid[index + 2 * width] == WALL:
+            steps.append(width)
+        if col >= 3 and grid[index - 2] == WALL:
+            steps.append(-1)
+        if col + 2 <= width - 2 and grid[index + 2] == WALL:
+            steps.append(1)
+        if not steps:
+            stack.pop()
+            continue
+        step = steps[rng.randrange(len(steps))] if len(steps) > 1 else steps[0]
+        grid[index + step] = OPEN
+        grid[index + 2 * step] = OPEN
+        stack.append(index + 2 * step)
+    return grid
+
+
+def open_room(height, width, rng):
+    """
+    Returns a grid of cell codes that is open inside a wall border.
+    """
+    grid = bytearray(height * width)
+    _add_border(grid, height, width)
+    return grid
+
+
+def sparse_obstacles(height, width, rng, density=0.2):
+    """
+    Returns a grid of cell codes inside a wall border where each cell
+    is a wall with probability density. Below about 0.4 the open cells
+    almost always form one connected region.
+    """
+    # Draw one random byte per cell and map the low ones to walls
+    threshold = round(density * 256)
+    codes = bytes([WALL] * threshold + [OPEN] * (256 - threshold))
+    grid = bytearray(rng.randbytes(height * width).translate(codes))
+    _add_border(grid, height, width)
+    return grid
+
+
+def _add_border(grid, height, width):
+    grid[:width] = bytes([WALL]) * width
+    grid[-width:] = bytes([WALL]) * width
+    grid[::width] = bytes([WALL]) * height
+    grid[width - 1::width] = bytes([WALL]) * height
+
+
+def generate(filename, height, width, topology="perfect", seed=0, density=0.2):
+    """
+    Writes a height x width maze of the given topology to filename in
+    the format Maze reads, with the start in the top left cell and the
+    goal in the bottom right cell inside the border.
+    """
+    if height < 3 or width < 3:
+        raise ValueError("maze must be at least 3 x 3")
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"unknown topology {topology!r}, expected one of {TOPOLOGIES}")
+
+    # In a perfect maze only odd coordinates are cells
+    goal_row = height - 2 if height % 2 or topology != "perfect" else height - 3
+    goal_col = width - 2 if width % 2 or topology != "perfect" else width - 3
+    if goal_row * width + goal_col == width + 1:
+        raise ValueError(f"a {height} x {width} {topology} maze has no room "
+                         f"for a goal apart from the start")
+
+    rng = random.Random(seed)
+    if topology == "perfect":
+        grid = perfect_maze(height, width, rng)
+    elif topology == "open":
+        grid = open_room(height, width, rng)
+    else:
+        grid = sparse_obstacles(height, width, rng, density)
+
+    grid[width + 1] = START
+    grid[goal_row * width + goal_col] = GOAL
+
+    # Translate the whole grid once, then write it a row at a time
+    text = memoryview(grid.translate(CELL_CHARS))
+    with open(filename, "wb") as f:
+        for row in range(height):
+            f.write(text[row * width:(row + 1) * width])
+            f.write(b"\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a random maze file."
+    )
+    parser.add_argument("filename")
+    parser.add_argument("--height", type=int, default=101)
+    parser.add_argument("--width", type=int,
+                        help="width in cells (default: same as height)")
+    parser.add_argument("--topology", choices=TOPOLOGIES, default="perfect",
+                        help="perfect maze, open room, or room with sparse obstacles")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--density", type=float, default=0.2,
+                        help="fraction of cells that are walls, for obstacles")
+    args = parser.parse_args()
+
+    width = args.width if args.width is not None else args.height
+    try:
+        generate(args.filename, args.height, width, args.topology, args.seed, args.density)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Wrote a {args.height} x {width} {args.topology} maze to {args.filename}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
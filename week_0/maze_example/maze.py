@@ -1,4 +1,15 @@
+import argparse
+import csv
+import glob
+import heapq
+import json
+import os
 import sys
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count, repeat
 
 class Node():
     def __init__(self, state, parent, action):
@@ -39,60 +50,196 @@ class QueueFrontier(StackFrontier):
             self.frontier = self.frontier[1:]
             return node
 
+
+class DequeStackFrontier():
+    """
+    Stack frontier that pops in constant time and keeps a count
+    of the states it holds, so contains_state is a hash lookup.
+    """
+    def __init__(self):
+        self.frontier = deque()
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def _pop(self):
+        return self.frontier.pop()
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self._pop()
+            count = self.states[node.state] - 1
+            if count:
+                self.states[node.state] = count
+            else:
+                del self.states[node.state]
+            return node
+
+
+class DequeQueueFrontier(DequeStackFrontier):
+
+    def _pop(self):
+        return self.frontier.popleft()
+
+
+class PriorityFrontier(DequeStackFrontier):
+    """
+    Frontier backed by a binary heap that removes the node with the
+    lowest priority(node) first, oldest first among ties. Priorities
+    may be tuples, to break ties on further keys.
+    """
+    def __init__(self, priority):
+        super().__init__()
+        self.frontier = []
+        self.priority = priority
+        self.counter = count()
+
+    def add(self, node):
+        heapq.heappush(self.frontier, (self.priority(node), next(self.counter), node))
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def _pop(self):
+        return heapq.heappop(self.frontier)[2]
+
+
+OPPOSITE = {"up": "down", "down": "up", "left": "right", "right": "left"}
+
+STRATEGIES = ("dfs", "bfs", "greedy", "astar", "bidirectional")
+
+SUMMARY_FIELDS = ["file", "strategy", "explored", "path_length", "seconds", "error"]
+
+
+# Integer codes for each cell of Maze.grid
+OPEN = 0
+WALL = 1
+START = 2
+GOAL = 3
+
+# Byte translation table from maze file characters to cell codes
+CELL_CODES = bytearray([WALL]) * 256
+CELL_CODES[ord(" ")] = OPEN
+CELL_CODES[ord("A")] = START
+CELL_CODES[ord("B")] = GOAL
+CELL_CODES = bytes(CELL_CODES)
+
+# Palette used by Maze.output_image, indexed by color number
+PALETTE = [
+    0, 0, 0,           # Border
+    40, 40, 40,        # Wall
+    255, 0, 0,         # Start
+    0, 171, 28,        # Goal
+    220, 235, 113,     # Solution
+    212, 97, 85,       # Explored
+    237, 240, 252      # Empty cell
+]
+SOLUTION_COLOR = 4
+EXPLORED_COLOR = 5
+
+# Byte translation table from cell codes to palette colors
+CELL_COLORS = bytearray(256)
+CELL_COLORS[OPEN] = 6
+CELL_COLORS[WALL] = 1
+CELL_COLORS[START] = 2
+CELL_COLORS[GOAL] = 3
+CELL_COLORS = bytes(CELL_COLORS)
+
+
 class Maze():
 
     def __init__(self, filename):
 
-        # Read file and set height and width of maze
-        with open(filename) as f:
-            contents = f.read()
+        # Parse the file a line at a time into one byte per cell
+        with open(filename, "rb") as f:
+            self._parse(f)
+
+        self.solution = None
+
+
+    def _parse(self, f):
+        """
+        Builds the grid in a single streaming pass over the lines of
+        binary file f, validating the start and goal as it goes.
+        """
+        self.grid = bytearray()
+        lengths = array("I")
+        starts = goals = 0
+        for line in _lines(f):
+
+            # Translate the whole line at once; any non-ASCII character
+            # becomes a single "?" and so a wall
+            if not line.isascii():
+                line = line.decode("utf-8", "replace").encode("ascii", "replace")
+            codes = line.translate(CELL_CODES)
+            starts += codes.count(START)
+            goals += codes.count(GOAL)
+            self.grid += codes
+            lengths.append(len(codes))
 
         # Validate start and goal
-        if contents.count("A") != 1:
+        if starts != 1:
             raise Exception("maze must have exactly one start point")
-        if contents.count("B") != 1:
+        if goals != 1:
             raise Exception("maze must have exactly one goal")
 
         # Determine height and width of maze
-        contents = contents.splitlines()
-        self.height = len(contents)
-        self.width = max(len(line) for line in contents)
+        self.height = len(lengths)
+        self.width = max(lengths)
+
+        # Pad short rows with open cells, moving rows into place from
+        # the last one back so the grid is never copied as a whole
+        if len(self.grid) != self.height * self.width:
+            offset = len(self.grid)
+            self.grid.extend(bytes(self.height * self.width - len(self.grid)))
+            for row in range(self.height - 1, -1, -1):
+                length = lengths[row]
+                offset -= length
+                target = row * self.width
+                if target != offset:
+                    self.grid[target:target + length] = self.grid[offset:offset + length]
+                self.grid[target + length:target + self.width] = bytes(self.width - length)
+
+        self.start = divmod(self.grid.index(START), self.width)
+        self.goal = divmod(self.grid.index(GOAL), self.width)
+
+
+    @property
+    def walls(self):
+        """Rows of booleans, True where there is a wall."""
+        return [
+            [code == WALL for code in self.grid[i * self.width:(i + 1) * self.width]]
+            for i in range(self.height)
+        ]
 
-        # Keep track of walls
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
 
-        self.solution = None
+    def index(self, state):
+        """Returns the flat grid index of a (row, col) state."""
+        return state[0] * self.width + state[1]
 
 
     def print(self):
         solution = self.solution[1] if self.solution is not None else None
+        solution = set(solution) if solution is not None else set()
         print()
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-                if col:
+        for i in range(self.height):
+            for j in range(self.width):
+                code = self.grid[i * self.width + j]
+                if code == WALL:
                     print("█", end="")
-                elif (i, j) == self.start:
+                elif code == START:
                     print("A", end="")
-                elif (i, j) == self.goal:
+                elif code == GOAL:
                     print("B", end="")
-                elif solution is not None and (i, j) in solution:
+                elif (i, j) in solution:
                     print("*", end="")
                 else:
                     print(" ", end="")
@@ -101,129 +248,459 @@ class Maze():
 
 
     def neighbors(self, state):
-        row, col = state
-        candidates = [
-            ("up", (row - 1, col)),
-            ("down", (row + 1, col)),
-            ("left", (row, col - 1)),
-            ("right", (row, col + 1))
+        return [
+            (action, divmod(index, self.width))
+            for action, index in self.flat_neighbors(self.index(state))
         ]
 
+
+    def flat_neighbors(self, index):
+        """
+        Returns (action, index) pairs for the open cells next to the
+        cell at a flat grid index.
+        """
+        grid = self.grid
+        width = self.width
+        col = index % width
         result = []
-        for action, (r, c) in candidates:
-            if 0 <= r < self.height and 0 <= c < self.width and not self.walls[r][c]:
-                result.append((action, (r, c)))
+        if index >= width and grid[index - width] != WALL:
+            result.append(("up", index - width))
+        if index + width < len(grid) and grid[index + width] != WALL:
+            result.append(("down", index + width))
+        if col > 0 and grid[index - 1] != WALL:
+            result.append(("left", index - 1))
+        if col < width - 1 and grid[index + 1] != WALL:
+            result.append(("right", index + 1))
         return result
 
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def manhattan(self, state):
+        """Returns the Manhattan distance from state to the goal."""
+        return abs(state[0] - self.goal[0]) + abs(state[1] - self.goal[1])
+
+
+    def solve(self, strategy="dfs"):
+        """
+        Finds a solution to maze, if one exists.
+
+        strategy is one of "dfs" (the default), "bfs", "greedy"
+        (greedy best-first), "astar" (A* with a Manhattan heuristic)
+        or "bidirectional" (BFS from both start and goal).
+        States are searched as flat grid indices.
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+        if strategy == "bidirectional":
+            return self.solve_bidirectional()
+
+        width = self.width
+        goal_row, goal_col = self.goal
+        goal = self.index(self.goal)
+
+        def heuristic(index):
+            row, col = divmod(index, width)
+            return abs(row - goal_row) + abs(col - goal_col)
 
         # Keep track of number of states explored
         self.num_explored = 0
 
+        # Cost of the best known path to each state, for A*
+        costs = {self.index(self.start): 0}
+
         # Initialize frontier to just the starting position
-        start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
+        start = Node(state=self.index(self.start), parent=None, action=None)
+        if strategy == "dfs":
+            frontier = DequeStackFrontier()
+        elif strategy == "bfs":
+            frontier = DequeQueueFrontier()
+        elif strategy == "greedy":
+            frontier = PriorityFrontier(lambda node: heuristic(node.state))
+        else:
+            # Among equal f = g + h, prefer the cell nearest the goal,
+            # so open areas are crossed straight rather than in layers
+            def priority(node):
+                h = heuristic(node.state)
+                return costs[node.state] + h, h
+            frontier = PriorityFrontier(priority)
         frontier.add(start)
 
         # Initialize an empty explored set
-        self.explored = set()
+        explored = set()
 
         # Keep looping until solution found
         while True:
 
             # If nothing left in frontier, then no path
             if frontier.empty():
+                self.explored = self._cells(explored)
                 raise Exception("no solution")
 
-            # Choose a node from the frontier
+            # Choose a node from the frontier, skipping stale A* entries
             node = frontier.remove()
+            if node.state in explored:
+                continue
             self.num_explored += 1
 
             # If node is the goal, then we have a solution
-            if node.state == self.goal:
+            if node.state == goal:
                 actions = []
                 cells = []
                 while node.parent is not None:
                     actions.append(node.action)
-                    cells.append(node.state)
+                    cells.append(divmod(node.state, width))
                     node = node.parent
                 actions.reverse()
                 cells.reverse()
                 self.solution = (actions, cells)
+                self.explored = self._cells(explored)
                 return
 
             # Mark node as explored
-            self.explored.add(node.state)
+            explored.add(node.state)
 
             # Add neighbors to frontier
-            for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
-                    child = Node(state=state, parent=node, action=action)
-                    frontier.add(child)
-
-
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
-
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
-
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
-
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
-
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
-
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
+            cost = costs.get(node.state, 0) + 1
+            for action, state in self.flat_neighbors(node.state):
+                if state in explored:
+                    continue
+                if strategy == "astar":
+                    if cost >= costs.get(state, cost + 1):
+                        continue
+                    costs[state] = cost
+                elif frontier.contains_state(state):
+                    continue
+                child = Node(state=state, parent=node, action=action)
+                frontier.add(child)
+
+
+    def solve_bidirectional(self):
+        """
+        Finds a shortest solution by breadth-first search from both
+        the start and the goal, expanding the smaller frontier layer.
+        """
+        self.num_explored = 0
+        explored = set()
+        start = self.index(self.start)
+        goal = self.index(self.goal)
+
+        # Each side maps index -> (action, previous index)
+        forward = {start: (None, None)}
+        backward = {goal: (None, None)}
+        forward_frontier = [start]
+        backward_frontier = [goal]
+        meeting = start if start == goal else None
+
+        while meeting is None:
+            if not forward_frontier or not backward_frontier:
+                self.explored = self._cells(explored)
+                raise Exception("no solution")
 
-                # Empty cell
-                else:
-                    fill = (237, 240, 252)
-
-                # Draw cell
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
-
-        img.save(filename)
-
-
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
-
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+            if len(forward_frontier) <= len(backward_frontier):
+                frontier, parents, other = forward_frontier, forward, backward
+            else:
+                frontier, parents, other = backward_frontier, backward, forward
+
+            next_frontier = []
+            for state in frontier:
+                self.num_explored += 1
+                explored.add(state)
+                for action, neighbor in self.flat_neighbors(state):
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = (action, state)
+                    next_frontier.append(neighbor)
+                    if meeting is None and neighbor in other:
+                        meeting = neighbor
+
+            if frontier is forward_frontier:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+
+        # Walk back to the start, then forward to the goal
+        actions = []
+        cells = []
+        state = meeting
+        while forward[state][1] is not None:
+            action, previous = forward[state]
+            actions.append(action)
+            cells.append(divmod(state, self.width))
+            state = previous
+        actions.reverse()
+        cells.reverse()
+
+        state = meeting
+        while backward[state][1] is not None:
+            action, following = backward[state]
+            actions.append(OPPOSITE[action])
+            cells.append(divmod(following, self.width))
+            state = following
+        self.solution = (actions, cells)
+        self.explored = self._cells(explored)
+
+
+    def distance_field(self, source=None):
+        """
+        Returns an array with the number of steps from source (the
+        start by default) to every cell, in flat grid order, with -1
+        for walls and unreachable cells.
+
+        The field is grown one whole frontier at a time over the grid,
+        without building a Node for every cell.
+        """
+        grid = self.grid
+        width = self.width
+        size = len(grid)
+        origin = self.index(source if source is not None else self.start)
+
+        distances = array("i", [-1]) * size
+        distances[origin] = 0
+        frontier = [origin]
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            append = next_frontier.append
+            for index in frontier:
+                col = index % width
+                if index >= width:
+                    up = index - width
+                    if distances[up] < 0 and grid[up] != WALL:
+                        distances[up] = distance
+                        append(up)
+                down = index + width
+                if down < size and distances[down] < 0 and grid[down] != WALL:
+                    distances[down] = distance
+                    append(down)
+                if col > 0:
+                    left = index - 1
+                    if distances[left] < 0 and grid[left] != WALL:
+                        distances[left] = distance
+                        append(left)
+                if col < width - 1:
+                    right = index + 1
+                    if distances[right] < 0 and grid[right] != WALL:
+                        distances[right] = distance
+                        append(right)
+            frontier = next_frontier
+        return distances
+
+
+    def path_from_field(self, distances, target=None):
+        """
+        Returns the (actions, cells) solution from the source of a
+        distance field to target (the goal by default), in the same
+        format as self.solution, or None if target is unreachable.
+
+        The path is traced back from target by stepping to any
+        neighbor one step closer, so it costs only its own length.
+        """
+        index = self.index(target if target is not None else self.goal)
+        if distances[index] < 0:
+            return None
+        actions = []
+        cells = []
+        while distances[index] > 0:
+            for action, neighbor in self.flat_neighbors(index):
+                if distances[neighbor] == distances[index] - 1:
+                    actions.append(OPPOSITE[action])
+                    cells.append(divmod(index, self.width))
+                    index = neighbor
+                    break
+        actions.reverse()
+        cells.reverse()
+        return actions, cells
+
+
+    def _cells(self, indices):
+        """Returns the set of (row, col) states for flat indices."""
+        width = self.width
+        return {divmod(index, width) for index in indices}
+
+
+    def output_image(self, filename, show_solution=True, show_explored=False,
+                     cell_size=50, cell_border=2, tile_size=None):
+        """
+        Renders the maze to an image file.
+
+        Every cell becomes a cell_size pixel square with a cell_border
+        pixel black border. If tile_size is given, the maze is split
+        into tiles of at most tile_size x tile_size cells, each saved
+        to its own file named like "maze_<row>_<col>.png".
+
+        Returns the list of files written.
+        """
+        from PIL import Image
+
+        # One palette index per cell, in flat grid order
+        colors = bytearray(self.grid.translate(CELL_COLORS))
+        if self.solution is not None:
+            width = self.width
+            if show_explored:
+                for i, j in self.explored:
+                    if self.grid[i * width + j] == OPEN:
+                        colors[i * width + j] = EXPLORED_COLOR
+            if show_solution:
+                for i, j in self.solution[1]:
+                    if self.grid[i * width + j] == OPEN:
+                        colors[i * width + j] = SOLUTION_COLOR
+
+        tile_height = tile_width = tile_size
+        if tile_size is None:
+            tile_height, tile_width = self.height, self.width
+        if tile_size is None or (self.height <= tile_size and self.width <= tile_size):
+            tiles = [(filename, 0, 0)]
+        else:
+            stem, dot, extension = filename.rpartition(".")
+            if not dot:
+                stem, extension = filename, "png"
+            tiles = [
+                (f"{stem}_{row // tile_height}_{col // tile_width}.{extension}", row, col)
+                for row in range(0, self.height, tile_height)
+                for col in range(0, self.width, tile_width)
+            ]
+
+        masks = {}
+        for name, row, col in tiles:
+            height = min(tile_height, self.height - row)
+            width = min(tile_width, self.width - col)
+            cells = b"".join(
+                colors[i * self.width + col:i * self.width + col + width]
+                for i in range(row, row + height)
+            )
+
+            # Scale cells up, then black out the borders between them
+            img = Image.frombytes("L", (width, height), cells)
+            img = img.resize((width * cell_size, height * cell_size), Image.NEAREST)
+            if cell_border > 0:
+                if (width, height) not in masks:
+                    masks[(width, height)] = _border_mask(width, height, cell_size, cell_border)
+                img = Image.composite(img, Image.new("L", img.size, 0), masks[(width, height)])
+            img.putpalette(PALETTE)
+            img.convert("RGB").save(name)
+
+        return [name for name, _, _ in tiles]
+
+
+def _lines(f):
+    """
+    Yields the lines of binary file f without line endings, treating
+    LF, CRLF and CR as line breaks like text mode does.
+    """
+    for line in f:
+        if line.endswith(b"\n"):
+            line = line[:-1]
+        if b"\r" not in line:
+            yield line
+            continue
+        parts = line.split(b"\r")
+        if line.endswith(b"\r"):
+            parts.pop()
+        yield from parts
+
+
+def _border_mask(width, height, cell_size, cell_border):
+    """
+    Returns an "L" mask image of width x height cells that is white
+    inside each cell and black on its border.
+    """
+    from PIL import Image
+    cell_border = min(cell_border, cell_size)
+    inside = max(cell_size - 2 * cell_border + 1, 0)
+    after = cell_size - cell_border - inside
+    cell = bytes(cell_border) + b"\xff" * inside + bytes(after)
+    row = cell * width
+    blank = bytes(len(row))
+    data = (blank * cell_border + row * inside + blank * after) * height
+    return Image.frombytes("L", (width * cell_size, height * cell_size), data)
+
+
+def solve_file(filename, strategy="dfs", image=False):
+    """
+    Solves the maze in filename and returns a summary dictionary
+    with the number of states explored, the path length and the
+    time taken. If image is True, the solution is also rendered
+    next to the maze file.
+    """
+    summary = {"file": filename, "strategy": strategy}
+    start = time.perf_counter()
+    try:
+        m = Maze(filename)
+        m.solve(strategy)
+    except Exception as e:
+        summary.update(explored=None, path_length=None, error=str(e))
+    else:
+        summary.update(explored=m.num_explored, path_length=len(m.solution[0]), error="")
+        if image:
+            m.output_image(os.path.splitext(filename)[0] + ".png", show_explored=True)
+    summary["seconds"] = round(time.perf_counter() - start, 6)
+    return summary
+
+
+def solve_batch(pattern, strategy="dfs", workers=None, image=False):
+    """
+    Solves every maze matched by pattern, a directory (all its .txt
+    files) or a glob, in a process pool. Returns the summaries in
+    file order.
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.txt")
+    filenames = sorted(glob.glob(pattern))
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(
+            solve_file, filenames, repeat(strategy), repeat(image),
+            chunksize=max(len(filenames) // (4 * (workers or os.cpu_count() or 1)), 1)
+        ))
+
+
+def write_summary(summaries, outfile, format="csv"):
+    """
+    Writes batch summaries to outfile as CSV or JSON.
+    """
+    if format == "json":
+        json.dump(summaries, outfile, indent=2)
+        outfile.write("\n")
+        return
+    writer = csv.DictWriter(outfile, fieldnames=SUMMARY_FIELDS)
+    writer.writeheader()
+    writer.writerows(summaries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve mazes.")
+    parser.add_argument("maze", help="maze file, or directory or glob with --batch")
+    parser.add_argument("--strategy", default="dfs", choices=STRATEGIES,
+                        help="search strategy (default: dfs)")
+    parser.add_argument("--batch", action="store_true",
+                        help="solve every maze in a directory or glob in parallel")
+    parser.add_argument("--workers", type=int, help="worker processes for --batch")
+    parser.add_argument("--images", action="store_true",
+                        help="with --batch, also write an image for every maze")
+    parser.add_argument("--summary", metavar="FILE",
+                        help="with --batch, write the summary here (.json or .csv) "
+                             "instead of CSV on stdout")
+    args = parser.parse_args()
+
+    if args.batch:
+        summaries = solve_batch(args.maze, args.strategy, args.workers, args.images)
+        if args.summary is None:
+            write_summary(summaries, sys.stdout)
+        else:
+            format = "json" if args.summary.endswith(".json") else "csv"
+            with open(args.summary, "w", newline="") as f:
+                write_summary(summaries, f, format)
+        return
+
+    m = Maze(args.maze)
+    print("Maze:")
+    m.print()
+    print("Solving...")
+    m.solve(args.strategy)
+    print("States Explored:", m.num_explored)
+    print("Solution:")
+    m.print()
+    m.output_image("maze.png", show_explored=True)
+
+
+if __name__ == "__main__":
+    main()
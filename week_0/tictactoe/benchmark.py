@@ -0,0 +1,102 @@
+import argparse
+import os
+import tempfile
+import time
+
+import bitboard
+import solution
+import tictactoe as ttt
+
+ENGINES = {
+    "list": ttt,
+    "bitboard": bitboard
+}
+
+
+def count_games(engine, state):
+    """
+    Returns the number of positions in the full game tree below
+    state, searched with engine's terminal, actions and result.
+    """
+    if engine.terminal(state):
+        return 1
+    return 1 + sum(
+        count_games(engine, engine.result(state, action))
+        for action in engine.actions(state)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark full-tree search with the list and bitboard engines."
+    )
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    for name, engine in ENGINES.items():
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            nodes = count_games(engine, engine.initial_state())
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{name:>8} full tree: {nodes} nodes in {best * 1000:9.1f} ms "
+              f"({nodes / best:10.0f} nodes/sec)")
+
+    bitboard.table.clear()
+    for label in ["cold", "warm"]:
+        start = time.perf_counter()
+        move = bitboard.minimax(bitboard.initial_state())
+        print(f"bitboard minimax from the empty board ({label} table): "
+              f"{bitboard.to_action(move)} in {(time.perf_counter() - start) * 1000:.3f} ms")
+
+    # Search the replies directly, since tictactoe.minimax answers
+    # from the solution table instead whenever one has been built
+    replies = [
+        bitboard.result(bitboard.initial_state(), move)
+        for move in bitboard.actions(bitboard.initial_state())
+    ]
+    bitboard.table.clear()
+    start = time.perf_counter()
+    for state in replies:
+        bitboard.minimax(state)
+    print(f"bitboard minimax for all 9 replies to X's opening (cold table): "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"transposition table: {bitboard.table.stats()}")
+
+    board = ttt.initial_state()
+    path = "solution table" if solution.best_move(bitboard.initial_state()) is not None \
+        else "search, warm table"
+    start = time.perf_counter()
+    for action in sorted(ttt.actions(board)):
+        ttt.minimax(ttt.result(board, action))
+    print(f"tictactoe minimax for all 9 replies to X's opening ({path}): "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # Build from a cold transposition table, then load what was written
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "solution.table")
+        bitboard.table.clear()
+        start = time.perf_counter()
+        table = solution.build()
+        solution.save(table, path)
+        print(f"solution table: built and saved in "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+        start = time.perf_counter()
+        table = solution.load(path)
+        solution.lookup(table, bitboard.initial_state())
+        print(f"solution table: loaded and first lookup in "
+              f"{(time.perf_counter() - start) * 1000:.3f} ms")
+
+        start = time.perf_counter()
+        for state in replies * 1000:
+            solution.lookup(table, state)
+        print(f"solution table: "
+              f"{(time.perf_counter() - start) / (len(replies) * 1000) * 1e6:.2f} us "
+              f"per lookup")
+        del table
+
+
+if __name__ == "__main__":
+    main()
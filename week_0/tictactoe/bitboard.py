@@ -0,0 +1,329 @@
+"""
+Bitboard Tic Tac Toe engine
+
+A state is a tuple (x, o) of two 9-bit integers, with bit
+3 * i + j set where that player has a mark in cell (i, j).
+States are immutable, so a child costs one tuple.
+"""
+
+# Marks used by the list boards of tictactoe
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+# The eight winning lines as bit masks: rows, columns, diagonals
+LINES = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+)
+
+# For every 9-bit mask: whether it contains a line, how many marks
+# it has, and the bits set in it, lowest first
+WINS = bytes(any(mask & line == line for line in LINES) for mask in range(FULL + 1))
+COUNTS = bytes(bin(mask).count("1") for mask in range(FULL + 1))
+BITS = tuple(
+    tuple(1 << i for i in range(9) if mask >> i & 1) for mask in range(FULL + 1)
+)
+
+# The eight symmetries of the board as cell permutations, with
+# cell 3 * i + j of a board moving to cell SYMMETRIES[s][3 * i + j]
+SYMMETRIES = tuple(
+    tuple(3 * i + j for i, j in (transform(c // 3, c % 3) for c in range(9)))
+    for transform in (
+        lambda i, j: (i, j),            # Identity
+        lambda i, j: (j, 2 - i),        # Rotations
+        lambda i, j: (2 - i, 2 - j),
+        lambda i, j: (2 - j, i),
+        lambda i, j: (i, 2 - j),        # Reflections
+        lambda i, j: (2 - i, j),
+        lambda i, j: (j, i),
+        lambda i, j: (2 - j, 2 - i)
+    )
+)
+
+# For every symmetry, the image of each 9-bit mask, and the
+# symmetry that undoes it
+TRANSFORMS = tuple(
+    tuple(
+        sum(1 << permutation[i] for i in range(9) if mask >> i & 1)
+        for mask in range(FULL + 1)
+    )
+    for permutation in SYMMETRIES
+)
+INVERSES = tuple(
+    next(
+        t for t, other in enumerate(SYMMETRIES)
+        if all(other[permutation[i]] == i for i in range(9))
+    )
+    for permutation in SYMMETRIES
+)
+
+# Kinds of value stored in the transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TranspositionTable():
+    """
+    Search results keyed on canonical position, so that a position
+    reached by different move orders, or any of its rotations and
+    reflections, is searched once.
+
+    Each entry is a (value, bound) pair for the player to move: an
+    EXACT value, or a LOWER or UPPER bound on it left by an alpha-beta
+    cutoff. Entries stay valid across searches, since a position's
+    value never changes.
+    """
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns the (value, bound) entry for key, or None.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key, value, bound):
+        self.entries[key] = (value, bound)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Shared by every search in this process
+table = TranspositionTable()
+
+
+def initial_state():
+    """
+    Returns the empty state.
+    """
+    return (0, 0)
+
+
+def player(state):
+    """
+    Returns player who has the next turn in state.
+    """
+    x, o = state
+    return X if COUNTS[x] == COUNTS[o] else O
+
+
+def actions(state):
+    """
+    Returns the moves available in state, as single-bit masks.
+    """
+    x, o = state
+    return BITS[FULL & ~(x | o)]
+
+
+def result(state, move):
+    """
+    Returns the state that results from making move in state.
+    """
+    x, o = state
+    if (x | o) & move or not 0 < move <= FULL:
+        raise RuntimeError
+    if COUNTS[x] == COUNTS[o]:
+        return (x | move, o)
+    return (x, o | move)
+
+
+def winner(state):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = state
+    if WINS[x]:
+        return X
+    if WINS[o]:
+        return O
+    return None
+
+
+def terminal(state):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = state
+    return bool(WINS[x] or WINS[o]) or x | o == FULL
+
+
+def utility(state):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    x, o = state
+    return 1 if WINS[x] else -1 if WINS[o] else 0
+
+
+def minimax(state):
+    """
+    Returns the optimal move for the current player in state, or
+    None if the game is over.
+
+    The search runs on the canonical form of state, and the chosen
+    move is mapped back onto state.
+    """
+    if terminal(state):
+        return None
+    (x, o), symmetry = canonical(state)
+    if COUNTS[x] == COUNTS[o]:
+        me, opp = x, o
+    else:
+        me, opp = o, x
+
+    # Moves that a symmetry of the position maps onto each other
+    # are equally good, so only the lowest of each is searched
+    stabilizers = [
+        transform for transform in TRANSFORMS
+        if transform[x] == x and transform[o] == o
+    ]
+
+    best_move = None
+    alpha = -2
+    for move in BITS[FULL & ~(x | o)]:
+        if any(transform[move] < move for transform in stabilizers):
+            continue
+        value = -_negamax(opp, me | move, -1, -alpha)
+        if value > alpha:
+            alpha = value
+            best_move = move
+            if alpha == 1:
+                break
+    return TRANSFORMS[INVERSES[symmetry]][best_move]
+
+
+def value(state):
+    """
+    Returns the value of state under perfect play: 1 if X wins,
+    -1 if O wins, 0 for a draw.
+    """
+    x, o = state
+    if COUNTS[x] == COUNTS[o]:
+        return _negamax(x, o, -1, 1)
+    return -_negamax(o, x, -1, 1)
+
+
+def canonical(state):
+    """
+    Returns (representative, symmetry): the state in the symmetry
+    class of state with the lowest key, and the index of the symmetry
+    in SYMMETRIES that maps state onto it.
+    """
+    x, o = state
+    key, symmetry = min(
+        (transform[x] | transform[o] << 9, s) for s, transform in enumerate(TRANSFORMS)
+    )
+    return (key & FULL, key >> 9), symmetry
+
+
+def position_key(me, opp):
+    """
+    Returns the table key for the position where the player to move
+    has marks me and the other player has marks opp. The key is the
+    same for all rotations and reflections of the position.
+    """
+    return min(transform[me] | transform[opp] << 9 for transform in TRANSFORMS)
+
+
+def _negamax(me, opp, alpha, beta):
+    # Value for the player to move, me, after opp has just moved
+    if WINS[opp]:
+        return -1
+    empty = FULL & ~(me | opp)
+    if not empty:
+        return 0
+
+    # A stored bound narrows the window, and may settle it outright
+    key = position_key(me, opp)
+    entry = table.get(key)
+    if entry is not None:
+        value, bound = entry
+        if bound == EXACT:
+            return value
+        if bound == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+    original_alpha = alpha
+
+    best = -1
+    for move in BITS[empty]:
+        v = -_negamax(opp, me | move, -beta, -alpha)
+        if v > best:
+            best = v
+            if v > alpha:
+                alpha = v
+                if alpha >= beta:
+                    break
+
+    if best <= original_alpha:
+        table.put(key, best, UPPER)
+    elif best >= beta:
+        table.put(key, best, LOWER)
+    else:
+        table.put(key, best, EXACT)
+    return best
+
+
+def from_board(board):
+    """
+    Returns the state of a list board as used by tictactoe.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (3 * i + j)
+            elif cell == O:
+                o |= 1 << (3 * i + j)
+    return (x, o)
+
+
+def to_board(state):
+    """
+    Returns the list board for state.
+    """
+    x, o = state
+    return [
+        [X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY
+         for j in range(3)]
+        for i in range(3)
+    ]
+
+
+def to_action(move):
+    """
+    Returns the (i, j) action for a move bit.
+    """
+    return divmod(move.bit_length() - 1, 3)
+
+
+def to_move(action):
+    """
+    Returns the move bit for an (i, j) action.
+    """
+    return 1 << (3 * action[0] + action[1])
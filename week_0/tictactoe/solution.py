@@ -0,0 +1,157 @@
+"""
+Perfect-play solution table for Tic Tac Toe
+
+Every reachable position is solved once and stored as one byte,
+at the position's base-3 index, holding the best move and the value.
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+
+import bitboard
+
+MAGIC = b"TTTSOLN\0"
+VERSION = 1
+
+# Table file layout:
+#   MAGIC, then <version, entry count> as two little-endian uint32,
+#   then one byte per position index.
+PREFIX = struct.Struct("<II")
+
+SIZE = 3 ** 9
+
+# Entry layout: the move's cell (0-8, or NO_MOVE once the game is
+# over) in the low four bits, and the value plus one in the next two.
+# Unreachable positions hold UNKNOWN.
+NO_MOVE = 15
+UNKNOWN = 0xFF
+
+# Base-3 digit weights of every 9-bit mask: cell 3 * i + j of a
+# position is 0 if empty, 1 for X and 2 for O
+TERNARY = tuple(
+    sum(3 ** i for i in range(9) if mask >> i & 1) for mask in range(bitboard.FULL + 1)
+)
+
+# Loaded on first use by best_move
+_table = None
+_loaded = False
+
+
+def position_index(state):
+    """
+    Returns the base-3 index of a bitboard state.
+    """
+    x, o = state
+    return TERNARY[x] + 2 * TERNARY[o]
+
+
+def build():
+    """
+    Returns the solution table as a bytearray, by enumerating every
+    position reachable from the empty board and solving each.
+    """
+    table = bytearray([UNKNOWN]) * SIZE
+    stack = [bitboard.initial_state()]
+    while stack:
+        state = stack.pop()
+        index = position_index(state)
+        if table[index] != UNKNOWN:
+            continue
+        if bitboard.terminal(state):
+            table[index] = (bitboard.utility(state) + 1) << 4 | NO_MOVE
+            continue
+        move = bitboard.minimax(state)
+        table[index] = (bitboard.value(state) + 1) << 4 | (move.bit_length() - 1)
+        stack.extend(bitboard.result(state, move) for move in bitboard.actions(state))
+    return table
+
+
+def table_path():
+    """
+    Returns the default path of the table file, next to this module.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "solution.table")
+
+
+def save(table, path):
+    """
+    Writes table to path, replacing any previous table atomically.
+    """
+    with open(f"{path}.tmp", "wb") as f:
+        f.write(MAGIC)
+        f.write(PREFIX.pack(VERSION, len(table)))
+        f.write(table)
+    os.replace(f"{path}.tmp", path)
+
+
+def load(path):
+    """
+    Returns a read-only view of the table stored at path, memory-
+    mapped rather than read, or None if there is no valid table.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+    with f:
+        if os.fstat(f.fileno()).st_size != len(MAGIC) + PREFIX.size + SIZE:
+            return None
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if data[:len(MAGIC)] != MAGIC:
+        return None
+    version, count = PREFIX.unpack_from(data, len(MAGIC))
+    if version != VERSION or count != SIZE:
+        return None
+    return memoryview(data)[len(MAGIC) + PREFIX.size:]
+
+
+def lookup(table, state):
+    """
+    Returns (move, value) for state from table, where move is a move
+    bit or None if the game is over, or None if state is not in table.
+    """
+    entry = table[position_index(state)]
+    if entry == UNKNOWN:
+        return None
+    cell = entry & 0xF
+    return (None if cell == NO_MOVE else 1 << cell), (entry >> 4) - 1
+
+
+def best_move(state):
+    """
+    Returns the best move bit for state from the table file, loading
+    it on first use, or None if there is no table or no entry.
+    """
+    global _table, _loaded
+    if not _loaded:
+        _table = load(table_path())
+        _loaded = True
+    if _table is None:
+        return None
+    entry = lookup(_table, state)
+    return None if entry is None else entry[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the perfect-play solution table."
+    )
+    parser.add_argument("--output", default=table_path())
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = build()
+    save(table, args.output)
+    solved = sum(entry != UNKNOWN for entry in table)
+    print(f"Solved {solved} positions into {args.output} "
+          f"in {time.perf_counter() - start:.3f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,12 @@
 Tic Tac Toe Player
 """
 
-import math
 import copy
 from datetime import datetime
 
+import bitboard
+import solution
+
 X = "X"
 O = "O"
 EMPTY = None
@@ -131,55 +133,11 @@ def minimax(board):
     """
     if terminal(board):
         return None
-    
-    if board == initial_state():
-        return (0, 0)
-    
-    def max_value(state, alpha, beta):
-        if terminal(state):
-            return utility(state)
-        v = -math.inf
-        for action in actions(state):
-            v = max(v, min_value(result(state, action), alpha, beta))
-            alpha = max(alpha, v)
-            if beta <= alpha:
-                return v
-        return v
-    
-    def min_value(state, alpha, beta):
-        if terminal(state):
-            return utility(state)
-        v = math.inf
-        for action in actions(state):
-            v = min(v, max_value(result(state, action), alpha, beta))
-            beta = min(beta, v)
-            if beta <= alpha:
-                return v
-        return v
-    
-    optimal_action = None
-    current_player = player(board)
-
-    if current_player == X:
-        maximize = True
-        res_utility = -math.inf
-    elif current_player == O:
-        maximize = False
-        res_utility = math.inf
-
-    alpha = -math.inf
-    beta = math.inf
-
-    for action in actions(board):
-        if maximize:
-            action_max_value = min_value(result(board, action), alpha, beta)
-            if action_max_value > res_utility:
-                res_utility = action_max_value
-                optimal_action = action
-        else:
-            action_min_value = max_value(result(board, action), alpha, beta)
-            if action_min_value < res_utility:
-                res_utility = action_min_value
-                optimal_action = action
-
-    return optimal_action
\ No newline at end of file
+
+    # Look the move up in the solution table if there is one, and
+    # otherwise search on the bitboard engine
+    state = bitboard.from_board(board)
+    move = solution.best_move(state)
+    if move is None:
+        move = bitboard.minimax(state)
+    return bitboard.to_action(move)